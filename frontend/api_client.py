@@ -0,0 +1,173 @@
+# frontend/api_client.py
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ApiError(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _detail(response):
+    try:
+        return response.json().get('detail', response.text)
+    except ValueError:
+        return response.text
+
+
+def token_expiry(token):
+    """The `exp` claim of a JWT as a Unix timestamp, read without verification; None if there isn't one."""
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return float(claims['exp'])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class ApiClient:
+    """Backend client shared by every Streamlit session of the process.
+
+    One pooled keep-alive session serves all requests. GET responses are
+    cached per (token, path) for `ttl` seconds, so reruns inside that window
+    make no request at all; an expired entry is revalidated with its ETag,
+    and a 304 costs a round trip but no body. Writes expire the entries they
+    affect. The cache holds at most `maxsize` entries, least recently used
+    out first, and entries for a token are dropped once the token itself has
+    expired, since a refreshed session never asks for them again.
+    """
+
+    def __init__(self, base_url, ttl=60.0, pool_size=10, timeout=10.0, maxsize=1024):
+        self.base_url = base_url.rstrip('/')
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size)
+        # (token, path) -> [expires_at, etag, data], least recently used first
+        self._cache = OrderedDict()
+        # token -> its `exp` claim, for tokens with cached entries
+        self._token_expiry = {}
+        self._lock = threading.Lock()
+
+    def _headers(self, token):
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+    def _request(self, method, path, token=None, **kwargs):
+        response = self.session.request(
+            method, self.base_url + path, headers=self._headers(token), timeout=self.timeout, **kwargs
+        )
+        if response.status_code != 200:
+            raise ApiError(response.status_code, _detail(response))
+        return response.json()
+
+    def get(self, path, token=None, ttl=None):
+        key = (token, path)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+        now = time.monotonic()
+        if entry is not None and entry[0] > now:
+            return entry[2]
+        headers = self._headers(token)
+        if entry is not None and entry[1]:
+            headers["If-None-Match"] = entry[1]
+        response = self.session.get(self.base_url + path, headers=headers, timeout=self.timeout)
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        if response.status_code == 304 and entry is not None:
+            data = entry[2]
+        elif response.status_code == 200:
+            data = response.json()
+        else:
+            raise ApiError(response.status_code, _detail(response))
+        self._store(key, [expires_at, response.headers.get('ETag') or (entry and entry[1]), data])
+        return data
+
+    def _store(self, key, entry):
+        token = key[0]
+        with self._lock:
+            if token not in self._token_expiry:
+                # A new token usually means an old one was refreshed or abandoned: sweep the expired ones.
+                self._sweep(time.time())
+                self._token_expiry[token] = token_expiry(token)
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def _sweep(self, now):
+        """Drops entries of expired tokens, and forgets tokens the LRU has already emptied."""
+        expired = {token for token, exp in self._token_expiry.items() if exp is not None and exp <= now}
+        for key in [key for key in self._cache if key[0] in expired]:
+            del self._cache[key]
+        live = {key[0] for key in self._cache}
+        for token in [token for token in self._token_expiry if token not in live]:
+            del self._token_expiry[token]
+
+    def get_many(self, paths, token=None):
+        """GETs several independent paths concurrently; returns results (or ApiErrors) in order."""
+        futures = [self.executor.submit(self.get, path, token) for path in paths]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except ApiError as e:
+                results.append(e)
+        return results
+
+    def expire(self, token, path=None):
+        """Marks cached entries stale. Their ETags are kept, so the next read is a conditional GET."""
+        with self._lock:
+            for key, entry in self._cache.items():
+                if key[0] == token and (path is None or key[1] == path):
+                    entry[0] = 0.0
+
+    def forget(self, token):
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == token]:
+                del self._cache[key]
+            self._token_expiry.pop(token, None)
+
+    # --- Endpoints ---
+
+    def register(self, email, password):
+        return self._request('POST', '/auth/register', json={"email": email, "password": password})
+
+    def login(self, email, password):
+        return self._request('POST', '/auth/login', json={"email": email, "password": password})
+
+    def me(self, token):
+        return self.get('/users/me', token, ttl=3600)
+
+    def my_reviews(self, token):
+        return self.get('/reviews/me', token)
+
+    def recommendations(self, token):
+        return self.get('/recommendations', token)
+
+    def create_review(self, token, movie_id, rating, review_text):
+        data = {"movie_id": movie_id, "rating": rating, "review_text": review_text}
+        result = self._request('POST', '/reviews', token, json=data)
+        self.expire(token, '/reviews/me')
+        self.expire(token, '/recommendations')
+        return result
+
+    def update_review(self, token, review_id, rating, review_text):
+        data = {"rating": rating, "review_text": review_text}
+        result = self._request('PUT', f'/reviews/{review_id}', token, json=data)
+        self.expire(token, '/reviews/me')
+        self.expire(token, '/recommendations')
+        return result
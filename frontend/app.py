@@ -1,15 +1,23 @@
 # frontend/app.py
 import streamlit as st
-import requests
 from streamlit_cookies_manager import EncryptedCookieManager
 from datetime import datetime
 
+from api_client import ApiClient, ApiError
+
 # --- CONFIGURATION ---
 st.set_page_config(layout="wide")
 API_URL = "http://127.0.0.1:8000"
 # This should be a secret key from your environment variables in a real app
 cookies = EncryptedCookieManager(password="a_very_secret_password_12345")
 
+@st.cache_resource
+def get_client():
+    # One pooled client (and response cache) for every session of this process.
+    return ApiClient(API_URL)
+
+client = get_client()
+
 # --- SESSION STATE INITIALIZATION ---
 if 'logged_in' not in st.session_state:
     st.session_state['logged_in'] = False
@@ -28,20 +36,20 @@ def login_view():
         password = st.text_input("Password", type="password")
         submitted = st.form_submit_button("Log In")
         if submitted:
-            res = requests.post(f"{API_URL}/auth/login", json={"email": email, "password": password})
-            if res.status_code == 200:
-                token = res.json().get('access_token')
+            try:
+                token = client.login(email, password).get('access_token')
+            except ApiError as e:
+                st.error(f"Login failed: {e.detail}")
+            else:
                 st.session_state['access_token'] = token
                 st.session_state['logged_in'] = True
                 cookies['access_token'] = token
-                # To get user email for display
-                headers = {"Authorization": f"Bearer {token}"}
-                user_res = requests.get(f"{API_URL}/users/me", headers=headers) # Assumes you have a /users/me endpoint
-                if user_res.status_code == 200:
-                    st.session_state.user_email = user_res.json().get('email')
+                # To get user email for display (cached for the next page too)
+                try:
+                    st.session_state.user_email = client.me(token).get('email')
+                except ApiError:
+                    pass
                 st.rerun()
-            else:
-                st.error(f"Login failed: {res.json().get('detail')}")
     if st.button("Don't have an account? Sign Up"):
         st.session_state.page = "signup"
         st.rerun()
@@ -54,31 +62,43 @@ def signup_view():
         password = st.text_input("Password", type="password")
         submitted = st.form_submit_button("Register")
         if submitted:
-            res = requests.post(f"{API_URL}/auth/register", json={"email": email, "password": password})
-            if res.status_code == 200:
+            try:
+                client.register(email, password)
+            except ApiError as e:
+                st.error(f"Registration failed: {e.detail}")
+            else:
                 st.success("Registration successful! Please log in.")
                 st.session_state.page = "login"
                 st.rerun()
-            else:
-                st.error(f"Registration failed: {res.json().get('detail')}")
     if st.button("Already have an account? Log In"):
         st.session_state.page = "login"
         st.rerun()
 
 def home_view():
-    # We will build out recommendations here later
+    token = st.session_state['access_token']
+    # Independent calls, fetched concurrently (and usually straight from the client cache).
+    user, recommendations = client.get_many(['/users/me', '/recommendations'], token)
+    if not isinstance(user, ApiError):
+        st.session_state.user_email = user.get('email')
     st.header(f"Welcome to CineRecs!")
     st.info("Navigate to 'My Reviews' to see and edit your reviews, or find a new movie to review!")
+    if isinstance(recommendations, ApiError):
+        st.warning("Could not fetch your recommendations.")
+    else:
+        st.subheader("Recommended for you")
+        for title in recommendations['recommendations']:
+            st.write(f"- {title}")
 
 def my_reviews_view():
     st.header("My Past Reviews")
-    headers = {"Authorization": f"Bearer {st.session_state['access_token']}"}
-    
-    # Fetch user's reviews from the API
-    response = requests.get(f"{API_URL}/reviews/me", headers=headers)
-    
-    if response.status_code == 200:
-        reviews = response.json()
+    token = st.session_state['access_token']
+
+    # Fetch user's reviews from the API (cached per token, revalidated with its ETag)
+    try:
+        reviews = client.my_reviews(token)
+    except ApiError:
+        st.error("Could not fetch your reviews.")
+    else:
         if not reviews:
             st.info("You haven't submitted any reviews yet. Find a movie and add one!")
         else:
@@ -87,7 +107,7 @@ def my_reviews_view():
                     st.subheader(review['title'])
                     st.write(f"**Your Rating:** {'⭐' * review['rating']}")
                     st.write(f"**Your Review:** {review['review_text']}")
-                    st.caption(f"Sentiment: {review['sentiment']}")
+                    st.caption(f"Sentiment: {review['sentiment'] or 'pending'}")
 
                     # Form to update the review
                     with st.expander("Update this review"):
@@ -97,16 +117,17 @@ def my_reviews_view():
                             submitted_update = st.form_submit_button("Submit Update")
 
                             if submitted_update:
-                                update_data = {"rating": new_rating, "review_text": new_text}
-                                update_res = requests.put(f"{API_URL}/reviews/{review['review_id']}", json=update_data, headers=headers)
-                                if update_res.status_code == 200:
+                                try:
+                                    client.update_review(token, review['review_id'], new_rating, new_text)
+                                except ApiError as e:
+                                    st.error(f"Update failed: {e.detail}")
+                                else:
                                     st.success("Review updated successfully!")
                                     st.rerun() # Rerun to show the updated review
-                                else:
-                                    st.error(f"Update failed: {update_res.json().get('detail')}")
 
-    else:
-        st.error("Could not fetch your reviews.")
+            # Sentiment is scored in the background; re-check on the next render.
+            if any(review['sentiment'] is None for review in reviews):
+                client.expire(token, '/reviews/me')
 
 
 # --- MAIN APP LOGIC (The "Router") ---
@@ -129,6 +150,7 @@ with st.sidebar:
             st.session_state.page = "my_reviews"
             st.rerun()
         if st.button("Logout"):
+            client.forget(st.session_state.access_token)
             cookies.delete('access_token')
             st.session_state.logged_in = False
             st.session_state.page = "login"
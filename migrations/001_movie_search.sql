@@ -0,0 +1,58 @@
+-- migrations/001_movie_search.sql
+-- Indexes behind GET /movies/: trigram GIN on titles (serves ILIKE and the
+-- word-similarity operators), a full-text vector, and a normalised genre
+-- lookup that replaces substring matching on movies.genres.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE movies
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(title, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS movies_title_trgm_idx ON movies USING gin (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS movies_search_vector_idx ON movies USING gin (search_vector);
+
+CREATE TABLE IF NOT EXISTS genres (
+    genre_id serial PRIMARY KEY,
+    name text NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS movie_genres (
+    genre_id integer NOT NULL REFERENCES genres ON DELETE CASCADE,
+    movie_id integer NOT NULL REFERENCES movies ON DELETE CASCADE,
+    PRIMARY KEY (genre_id, movie_id)
+);
+CREATE INDEX IF NOT EXISTS movie_genres_movie_id_idx ON movie_genres (movie_id);
+
+-- movies.genres stays the '|'-joined source of truth written by the loader;
+-- the trigger keeps the lookup tables in step with it.
+CREATE OR REPLACE FUNCTION sync_movie_genres() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM movie_genres WHERE movie_id = NEW.movie_id;
+    INSERT INTO genres (name)
+        SELECT DISTINCT name FROM unnest(string_to_array(NEW.genres, '|')) AS name WHERE name <> ''
+        ON CONFLICT (name) DO NOTHING;
+    INSERT INTO movie_genres (genre_id, movie_id)
+        SELECT g.genre_id, NEW.movie_id FROM genres g
+        WHERE g.name = ANY (string_to_array(NEW.genres, '|'))
+        ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS movies_sync_genres ON movies;
+CREATE TRIGGER movies_sync_genres
+    AFTER INSERT OR UPDATE OF genres ON movies
+    FOR EACH ROW EXECUTE FUNCTION sync_movie_genres();
+
+-- Backfill rows loaded before this migration.
+INSERT INTO genres (name)
+    SELECT DISTINCT name FROM movies, unnest(string_to_array(genres, '|')) AS name WHERE name <> ''
+    ON CONFLICT (name) DO NOTHING;
+INSERT INTO movie_genres (genre_id, movie_id)
+    SELECT g.genre_id, m.movie_id FROM movies m
+    JOIN genres g ON g.name = ANY (string_to_array(m.genres, '|'))
+    ON CONFLICT DO NOTHING;
+
+ANALYZE movies;
+ANALYZE movie_genres;
@@ -0,0 +1,11 @@
+-- migrations/002_reviews_updated_at.sql
+-- Watermark column for the incremental updater (src/updater.py). created_at
+-- never moves when a review is edited, so edited ratings never reached the
+-- model; update_review now bumps updated_at alongside the rating.
+
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS updated_at timestamptz;
+UPDATE reviews SET updated_at = created_at WHERE updated_at IS NULL;
+ALTER TABLE reviews ALTER COLUMN updated_at SET DEFAULT now();
+ALTER TABLE reviews ALTER COLUMN updated_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS reviews_updated_at_idx ON reviews (updated_at);
@@ -0,0 +1,71 @@
+# scripts/batch_recommend.py
+# Writes top-N recommendations for many users as NDJSON, for email and
+# notification jobs. Ranks exactly like POST /recommendations/batch: the
+# HybridRanker for users in the model, cold start from their reviews (read
+# from DATABASE_URL) for everyone else.
+#
+#   python -m scripts.batch_recommend --all -n 10 -o recs.ndjson
+#   python -m scripts.batch_recommend --users user_ids.txt
+import argparse
+import json
+import sys
+import time
+
+import joblib
+from sqlalchemy import create_engine
+
+from src.artifacts import load_bundle
+from src.config import settings
+from src.serving import ServedModel
+from src.updater import fetch_user_reviews
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch top-N recommendations as NDJSON.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--users', help='file with one user id per line')
+    source.add_argument('--all', action='store_true', help='every user in the model')
+    parser.add_argument('-n', type=int, default=10, help='recommendations per user')
+    parser.add_argument('--block-size', type=int, default=512, help='users scored per matrix product')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    parser.add_argument('--database-url', help='where reviews of users not in the model are read; defaults to DATABASE_URL from .env')
+    args = parser.parse_args()
+
+    bundle = load_bundle()
+    movies_df = joblib.load('src/movies_df.joblib')
+    titles = movies_df['title'].to_numpy()
+    model = ServedModel(
+        bundle,
+        svd_weight=settings.hybrid_svd_weight,
+        content_weight=settings.hybrid_content_weight,
+        candidate_pool=settings.hybrid_candidate_pool,
+        cold_start_ranking=settings.cold_start_ranking,
+        cold_start_min_ratings=settings.cold_start_min_ratings,
+        cold_start_reg=settings.cold_start_reg,
+    )
+    engine = create_engine(args.database_url or settings.database_url)
+
+    def fetch_reviews(user_ids):
+        with engine.connect() as connection:
+            return fetch_user_reviews(connection, [str(user_id) for user_id in user_ids])
+
+    if args.all:
+        user_ids = bundle.user_ids.tolist()
+    else:
+        with open(args.users) as f:
+            user_ids = [line.strip() for line in f if line.strip()]
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        for user_id, positions in model.rank_batch(user_ids, n=args.n, fetch_reviews=fetch_reviews, block_size=args.block_size):
+            out.write(json.dumps({"user_id": user_id, "recommendations": titles[positions].tolist()}) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(user_ids)} users in {elapsed:.2f}s ({len(user_ids) / elapsed:,.0f} users/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
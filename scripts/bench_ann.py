@@ -0,0 +1,61 @@
+# scripts/bench_ann.py
+# Recall and latency of the IVF item-factor index against exact search, per
+# nprobe. Runs on the served bundle, or on a synthetic catalogue of --items
+# vectors resampled from it to see how the index behaves at scale.
+#
+#   python -m scripts.bench_ann
+#   python -m scripts.bench_ann --items 100000 --nprobe 4 --nprobe 16 --nprobe 64
+import argparse
+import time
+
+import numpy as np
+
+from src.ann import IVFIndex, measure_recall
+from src.artifacts import load_bundle
+
+
+def latency(index, positions, nprobe):
+    """Per-query latencies in microseconds."""
+    timings = []
+    for position in positions:
+        start = time.perf_counter()
+        index.neighbours(position, 10, nprobe=nprobe)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return np.asarray(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the ANN item-factor index.')
+    parser.add_argument('--items', type=int, help='synthetic catalogue size (default: the served bundle)')
+    parser.add_argument('--nprobe', type=int, action='append', help='lists to probe (repeatable)')
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    bundle = load_bundle()
+    if args.items:
+        # Real factor vectors plus noise, so the synthetic set keeps their spread.
+        rng = np.random.default_rng(args.seed)
+        qi = np.asarray(bundle.qi)[np.flatnonzero(bundle.item_known)]
+        vectors = qi[rng.integers(0, len(qi), args.items)] + rng.normal(scale=qi.std(), size=(args.items, qi.shape[1]))
+        start = time.perf_counter()
+        index = IVFIndex.build(vectors, np.arange(args.items), args.items, seed=args.seed)
+        print(f"Built IVF index over {args.items:,} synthetic items in {time.perf_counter() - start:.2f}s")
+    else:
+        index = IVFIndex.from_bundle(bundle)
+        print(f"IVF index of bundle {bundle.version}: {len(index.items):,} items")
+    nprobes = sorted(set(args.nprobe or [1, 2, 4, 8, 16, 32]))
+    nprobes = [nprobe for nprobe in nprobes if nprobe < index.n_lists]
+    print(f"{index.n_lists} lists; recall@10 measured on {min(args.queries, len(index.items))} queries\n")
+
+    recall = measure_recall(index, nprobes, n_queries=args.queries, seed=args.seed)
+    positions = np.random.default_rng(args.seed).choice(np.asarray(index.items), args.queries)
+    print(f"{'nprobe':>8} {'recall@10':>10} {'p50 us':>10} {'p99 us':>10}")
+    for nprobe in nprobes + [None]:
+        timings = latency(index, positions, nprobe)
+        label = 'exact' if nprobe is None else nprobe
+        print(f"{label:>8} {recall.get(nprobe, 1.0):>10.3f} {np.percentile(timings, 50):>10.1f} {np.percentile(timings, 99):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# scripts/bench_startup.py
+# Compares API worker startup cost for the joblib pickles vs the memory-mapped
+# artifact bundle. Each measurement runs in a fresh interpreter, like a new
+# uvicorn worker would.
+#
+#   python -m scripts.bench_startup --runs 5
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def read_rss():
+    """Returns resident memory in MB, split into private (anon) and file-backed (shareable) pages."""
+    fields = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                fields[key] = int(value.split()[0]) / 1024
+    return {'rss_mb': fields.get('VmRSS'), 'rss_anon_mb': fields.get('RssAnon'), 'rss_file_mb': fields.get('RssFile')}
+
+
+def load_joblib():
+    import joblib
+    from src.scoring import SVDScorer
+
+    svd = joblib.load('src/svd_model.joblib')
+    movies_df = joblib.load('src/movies_df.joblib')
+    joblib.load('src/ratings_df.joblib')
+    joblib.load('src/tfidf_matrix.joblib')
+    return SVDScorer.from_svd(svd, movies_df['movie_id'].tolist())
+
+
+def load_bundle():
+    import joblib
+    from src.artifacts import load_bundle as load
+    from src.scoring import SVDScorer
+
+    bundle = load()
+    joblib.load('src/movies_df.joblib')
+    return SVDScorer.from_bundle(bundle)
+
+
+def run_child(mode):
+    # Heavy imports are paid by both modes alike; keep them out of the timing.
+    import numpy, pandas, scipy.sparse, sklearn, surprise  # noqa: F401
+    baseline = read_rss()
+    start = time.perf_counter()
+    scorer = (load_joblib if mode == 'joblib' else load_bundle)()
+    scorer.score('196')  # touch the factors so mapped pages are actually faulted in
+    elapsed = time.perf_counter() - start
+    rss = read_rss()
+    result = {'mode': mode, 'load_seconds': elapsed}
+    result.update({key: rss[key] - baseline[key] for key in rss})
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API worker startup: joblib pickles vs artifact bundle.')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--child', choices=['joblib', 'bundle'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args.child)
+        return
+
+    summary = {}
+    for mode in ('joblib', 'bundle'):
+        runs = []
+        for _ in range(args.runs):
+            out = subprocess.run(
+                [sys.executable, '-m', 'scripts.bench_startup', '--child', mode],
+                check=True, capture_output=True, text=True,
+            )
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        summary[mode] = {key: statistics.median(r[key] for r in runs) for key in runs[0] if key != 'mode'}
+
+    print(f"{'mode':<8} {'load s':>8} {'RSS MB':>8} {'private MB':>11} {'shared MB':>10}")
+    for mode, stats in summary.items():
+        print(f"{mode:<8} {stats['load_seconds']:>8.3f} {stats['rss_mb']:>8.1f} {stats['rss_anon_mb']:>11.1f} {stats['rss_file_mb']:>10.1f}")
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+# scripts/benchmark.py
+# Offline quality + in-process latency benchmark. Writes one JSON document so
+# runs can be diffed across commits; needs no network (the API is driven
+# through TestClient against a throwaway SQLite catalogue).
+#
+#   python -m scripts.benchmark -o bench.json
+#   python -m scripts.benchmark --skip-endpoints --k 5 --k 10 --k 20
+#   python -m scripts.benchmark --skip-offline --requests 500
+import argparse
+import json
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from surprise import SVD, Dataset, Reader
+
+from src.movielens import load_movies, load_ratings
+from src.ranking import HybridRanker
+from src.scoring import SVDScorer
+from src.user_index import UserItemIndex
+
+RANKERS = {
+    # name: (svd_weight, content_weight, whole catalogue as candidates)
+    'svd': (1.0, 0.0, False),
+    'content': (0.0, 1.0, True),
+    'hybrid': (0.5, 0.5, False),
+}
+
+
+# --- Offline evaluation ---
+
+def split_ratings(ratings, test_fraction, seed):
+    """Random per-user holdout: each user keeps at least one training rating."""
+    rng = np.random.default_rng(seed)
+    in_test = rng.random(len(ratings)) < test_fraction
+    first = ~ratings.duplicated('user_id')
+    in_test &= ~first.to_numpy()
+    return ratings[~in_test].reset_index(drop=True), ratings[in_test].reset_index(drop=True)
+
+
+def train(train_ratings, movies, n_factors, n_epochs, seed):
+    """Same models as src/model.py, fitted on the training split only."""
+    reader = Reader(rating_scale=(1, 5))
+    data = Dataset.load_from_df(train_ratings[['user_id', 'item_id', 'rating']], reader)
+    svd = SVD(n_factors=n_factors, n_epochs=n_epochs, random_state=seed)
+    svd.fit(data.build_full_trainset())
+    tfidf_matrix = TfidfVectorizer(stop_words='english').fit_transform(movies['genres'])
+    return svd, tfidf_matrix
+
+
+def content_only_scorer(scorer):
+    """A scorer that rates everything at the global mean, so only content decides the order."""
+    return SVDScorer(
+        np.zeros_like(scorer.pu), np.zeros_like(scorer.bu), np.zeros_like(scorer.qi), np.zeros_like(scorer.bi),
+        scorer.global_mean, scorer.user_index, scorer.item_known, scorer.rating_scale,
+    )
+
+
+def evaluate(ratings, movies, ks, relevant_rating, args):
+    train_ratings, test_ratings = split_ratings(ratings, args.test_fraction, args.seed)
+    start = time.perf_counter()
+    svd, tfidf_matrix = train(train_ratings, movies, args.factors, args.epochs, args.seed)
+    train_seconds = time.perf_counter() - start
+
+    movie_ids = movies['movie_id'].tolist()
+    scorer = SVDScorer.from_svd(svd, movie_ids)
+    user_ids = np.array(sorted(train_ratings['user_id'].astype(str).unique()), dtype=str)
+    user_items = UserItemIndex.from_ratings(train_ratings, user_ids, movie_ids)
+
+    # RMSE of the SVD estimates on held-out ratings (the rankers share them).
+    test_users = test_ratings['user_id'].astype(str).to_numpy()
+    positions = pd.Index(movie_ids).get_indexer(test_ratings['item_id'])
+    predictions = np.empty(len(test_ratings))
+    for user_id in np.unique(test_users):
+        rows = np.flatnonzero(test_users == user_id)
+        predictions[rows] = scorer.score(user_id)[positions[rows]]
+    errors = predictions - test_ratings['rating'].to_numpy()
+    offline = {
+        'train_ratings': len(train_ratings),
+        'test_ratings': len(test_ratings),
+        'train_seconds': round(train_seconds, 3),
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mae': float(np.mean(np.abs(errors))),
+        'rankers': {},
+    }
+
+    # Relevant = held-out items the user rated at least `relevant_rating`.
+    relevant = test_ratings[test_ratings['rating'] >= relevant_rating]
+    relevant_sets = {
+        str(user_id): set(group.tolist())
+        for user_id, group in relevant.groupby('user_id')['item_id']
+    }
+    eval_users = sorted(relevant_sets)
+    movie_id_array = np.asarray(movie_ids)
+    for name, (svd_weight, content_weight, whole_catalogue) in RANKERS.items():
+        ranker = HybridRanker(
+            content_only_scorer(scorer) if name == 'content' else scorer, user_items, tfidf_matrix,
+            svd_weight=svd_weight, content_weight=content_weight,
+            candidate_pool=len(movie_ids) if whole_catalogue else args.candidate_pool,
+        )
+        start = time.perf_counter()
+        ranked = dict(ranker.rank_batch(eval_users, n=max(ks)))
+        rank_seconds = time.perf_counter() - start
+        metrics = {'users': len(eval_users), 'rank_seconds': round(rank_seconds, 3)}
+        for k in ks:
+            precisions, recalls = [], []
+            for user_id in eval_users:
+                hits = len(relevant_sets[user_id].intersection(movie_id_array[ranked[user_id][:k]].tolist()))
+                precisions.append(hits / k)
+                recalls.append(hits / len(relevant_sets[user_id]))
+            metrics[f'precision@{k}'] = float(np.mean(precisions))
+            metrics[f'recall@{k}'] = float(np.mean(recalls))
+        offline['rankers'][name] = metrics
+    return offline
+
+
+# --- Endpoint latency ---
+
+BENCH_REVIEWER = 'bench-reviewer'
+
+
+def make_catalogue_db(movies, reviewer_ratings=10):
+    """SQLite stand-in with the app's tables, so search and cold-start run without Postgres.
+
+    BENCH_REVIEWER gets `reviewer_ratings` reviews, enough for a folded-in user vector.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix='bench_'), 'bench.db')
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE movies (movie_id INTEGER PRIMARY KEY, title TEXT, genres TEXT, poster_url TEXT);
+        CREATE TABLE reviews (
+            review_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            movie_id INTEGER NOT NULL REFERENCES movies (movie_id),
+            rating INTEGER NOT NULL,
+            review_text TEXT,
+            sentiment TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    connection.executemany(
+        "INSERT INTO movies (movie_id, title, genres) VALUES (?, ?, ?)",
+        movies[['movie_id', 'title', 'genres']].values.tolist(),
+    )
+    connection.executemany(
+        "INSERT INTO reviews (user_id, movie_id, rating) VALUES (?, ?, ?)",
+        [(BENCH_REVIEWER, int(movie_id), 5 - i % 3) for i, movie_id in enumerate(movies['movie_id'][:reviewer_ratings])],
+    )
+    connection.commit()
+    connection.close()
+    return f"sqlite:///{path}"
+
+
+def summarize(latencies, elapsed):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'mean_ms': float(latencies.mean()),
+        'throughput_rps': len(latencies) / elapsed,
+    }
+
+
+def time_endpoint(client, request, n_requests, warmup, before=None):
+    for i in range(warmup):
+        if before:
+            before()
+        request(i)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(n_requests):
+        if before:
+            before()
+        t = time.perf_counter()
+        response = request(i)
+        latencies.append(time.perf_counter() - t)
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.request.url} returned {response.status_code}: {response.text[:200]}")
+    result = summarize(latencies, time.perf_counter() - start)
+
+    # Separate pass under tracemalloc, which would skew the timings above.
+    tracemalloc.start()
+    peak = 0
+    for i in range(min(n_requests, 20)):
+        if before:
+            before()
+        tracemalloc.reset_peak()
+        request(i)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    result['peak_alloc_kb'] = peak / 1024
+    return result
+
+
+def bench_endpoints(movies, args):
+    # Never the .env database: the run must stay local and reproducible.
+    os.environ['DATABASE_URL'] = args.database_url or make_catalogue_db(movies)
+    os.environ['MODEL_RELOAD_INTERVAL'] = '0'
+    os.environ['SERVICE_API_KEY'] = 'bench-service-key'
+    from types import SimpleNamespace
+    from fastapi import Header
+    from fastapi.testclient import TestClient
+    import src.main as api
+
+    def bench_user(x_bench_user: str = Header('bench-user')):
+        return SimpleNamespace(id=x_bench_user, email='bench@example.com')
+
+    api.app.dependency_overrides[api.get_current_user] = bench_user
+    movie_ids = movies['movie_id'].to_numpy()
+    titles = movies['title'].str[:4].to_numpy()
+    user_ids = api.model_store.current.bundle.user_ids.tolist()
+
+    def recommendations_for(user_id):
+        return lambda i: client.get('/recommendations', headers={'X-Bench-User': user_id})
+
+    def clear_caches():
+        api.recommendation_cache.clear()
+        api.profile_cache.clear()
+
+    with TestClient(api.app) as client:
+        endpoints = {
+            # "cold" = caches cleared before each request; the user decides which path is taken.
+            'GET /recommendations (cold, bundle user)': (recommendations_for(user_ids[0]), clear_caches),
+            'GET /recommendations (cold, fold-in)': (recommendations_for(BENCH_REVIEWER), clear_caches),
+            'GET /recommendations (cold, new user)': (recommendations_for('bench-user'), clear_caches),
+            'GET /recommendations (cached)': (recommendations_for(user_ids[0]), None),
+            'POST /recommendations/batch (x50)': (
+                lambda i: client.post('/recommendations/batch', json={'user_ids': user_ids[i % 10 * 50:][:50], 'n': 10},
+                                      headers={'X-Service-Key': 'bench-service-key'}), None),
+            'GET /movies/{id}/similar': (lambda i: client.get(f'/movies/{movie_ids[i % len(movie_ids)]}/similar'), None),
+            'GET /movies/typeahead': (lambda i: client.get('/movies/typeahead', params={'q': titles[i % len(titles)]}), None),
+            'GET /movies/ (search)': (lambda i: client.get('/movies/', params={'title': titles[i % len(titles)]}), None),
+        }
+        results = {}
+        for name, (request, before) in endpoints.items():
+            results[name] = time_endpoint(client, request, args.requests, args.warmup, before)
+            print(f"  {name:<40} p50 {results[name]['p50_ms']:7.2f} ms  p99 {results[name]['p99_ms']:7.2f} ms  "
+                  f"{results[name]['throughput_rps']:8.0f} req/s")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline evaluation and endpoint latency benchmark.')
+    parser.add_argument('-o', '--output', default='benchmark.json')
+    parser.add_argument('--k', type=int, action='append', help='cut-offs for precision/recall (repeatable, default 10)')
+    parser.add_argument('--relevant-rating', type=float, default=4, help='held-out ratings counted as relevant')
+    parser.add_argument('--test-fraction', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--factors', type=int, default=100)
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--candidate-pool', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--database-url', help='time search against this database instead of a temp SQLite catalogue')
+    parser.add_argument('--skip-offline', action='store_true')
+    parser.add_argument('--skip-endpoints', action='store_true')
+    args = parser.parse_args()
+    ks = sorted(set(args.k or [10]))
+
+    ratings = load_ratings('data/u.data')
+    movies = load_movies('data/u.item', sep=' ')
+    report = {
+        'commit': git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'config': {key: value for key, value in vars(args).items() if key != 'output'} | {'k': ks},
+    }
+
+    if not args.skip_offline:
+        print("Evaluating rankers on a held-out split...")
+        report['offline'] = evaluate(ratings, movies, ks, args.relevant_rating, args)
+        print(f"  SVD RMSE {report['offline']['rmse']:.4f}")
+        for name, metrics in report['offline']['rankers'].items():
+            print(f"  {name:<8} " + "  ".join(f"P@{k} {metrics[f'precision@{k}']:.4f}  R@{k} {metrics[f'recall@{k}']:.4f}" for k in ks))
+
+    if not args.skip_endpoints:
+        print("Timing endpoints in-process...")
+        report['endpoints'] = bench_endpoints(movies, args)
+
+    report['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,68 +1,211 @@
 # scripts/enrich_movie_data.py
-import requests
+# Fills movies.poster_url from OMDb. Requests run concurrently through a pooled
+# HTTP client and a token-bucket rate limiter; results are written in batched
+# UPDATEs with a commit per batch, and titles OMDb has no poster for are
+# checkpointed, so a rerun picks up exactly where the last one stopped.
+#
+# The database and OMDb key default to DATABASE_URL and OMDB_API_KEY from .env.
+#
+#   python -m scripts.enrich_movie_data --concurrency 10 --rate 10
+#   python -m scripts.enrich_movie_data --omdb-url http://127.0.0.1:8001/   # e.g. a local mock
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+import httpx
 import pandas as pd
 from sqlalchemy import create_engine, text
-import time
-import urllib.parse
 
-# --- CONFIGURATION ---
-# Paste your new OMDb key and Supabase credentials here
-OMDB_API_KEY = "19fbc5cd"
-DB_PASSWORD = "Remo123the"
-DB_HOST = "db.epbqdwygxkvvkljjawnr.supabase.co"       # e.g., db.epbqdwygxkvvkljjawnr.supabase.co
+OMDB_API_URL = "http://www.omdbapi.com/"
+CHECKPOINT_PATH = "enrich_checkpoint.json"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
 
-# Construct the database URL safely
-encoded_password = urllib.parse.quote_plus(DB_PASSWORD)
-DATABASE_URL = f"postgresql://postgres:{encoded_password}@{DB_HOST}:5432/postgres"
-engine = create_engine(DATABASE_URL)
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
 
-OMDB_API_URL = "http://www.omdbapi.com/"
 
-def get_poster_url(movie_title):
-    """Fetches the poster URL for a movie from OMDb."""
+def backoff_delay(attempt, base=0.5, cap=30):
+    """Seconds to wait before retry number `attempt + 1`: base * 2**attempt, capped, with ±50% jitter."""
+    return min(cap, base * 2 ** attempt) * (0.5 + random.random())
+
+
+async def get_poster_url(client, bucket, omdb_url, movie_title, max_retries=4, backoff=0.5, api_key=None):
+    """Fetches the poster URL for a movie from OMDb, retrying transient failures with backoff."""
     # OMDb uses 't' for title and 'apikey' for the key
-    params = {"apikey": OMDB_API_KEY, "t": movie_title}
-    try:
-        response = requests.get(OMDB_API_URL, params=params)
-        response.raise_for_status() # Raise an exception for bad status codes
-        data = response.json()
-        
-        # Check if the API returned a successful response and a poster
-        if data.get('Response') == 'True' and data.get('Poster') != 'N/A':
-            return data['Poster']
-            
-    except requests.exceptions.RequestException as e:
-        print(f"API request failed for {movie_title}: {e}")
-    return None
-
-# --- MAIN SCRIPT ---
-with engine.connect() as connection:
+    params = {"apikey": api_key, "t": movie_title}
+    for attempt in range(max_retries + 1):
+        await bucket.acquire()
+        try:
+            response = await client.get(omdb_url, params=params)
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                data = response.json()
+                # Check if the API returned a successful response and a poster
+                if data.get('Response') == 'True' and data.get('Poster') != 'N/A':
+                    return data['Poster']
+                return None
+        except httpx.TransportError:
+            pass
+        if attempt < max_retries:
+            await asyncio.sleep(backoff_delay(attempt, backoff))
+    raise RuntimeError(f"gave up on {movie_title!r} after {max_retries + 1} attempts")
+
+
+def write_posters(engine, rows):
+    """One UPDATE ... FROM (VALUES ...) for a whole batch, committed on its own.
+
+    The VALUES list is named in a CTE rather than aliased inline, a form both
+    Postgres and the SQLite stand-in accept.
+    """
+    if not rows:
+        return
+    values = ", ".join(f"(:id{i}, :url{i})" for i in range(len(rows)))
+    params = {}
+    for i, (movie_id, poster_url) in enumerate(rows):
+        params[f"id{i}"] = int(movie_id)
+        params[f"url{i}"] = poster_url
+    query = text(
+        f"WITH v (movie_id, poster_url) AS (VALUES {values}) "
+        "UPDATE movies SET poster_url = v.poster_url FROM v "
+        "WHERE movies.movie_id = v.movie_id"
+    )
+    with engine.begin() as connection:
+        connection.execute(query, params)
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return set(json.load(f)["no_poster"])
+
+
+def save_checkpoint(path, no_poster):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"no_poster": sorted(no_poster)}, f)
+    os.replace(tmp, path)
+
+
+async def enrich(movies, engine, args):
+    queue = asyncio.Queue()
+    for row in movies.itertuples(index=False):
+        queue.put_nowait((row.movie_id, row.title))
+
+    bucket = TokenBucket(args.rate)
+    no_poster = load_checkpoint(args.checkpoint)
+    found, missing = [], []
+    stats = {"found": 0, "not_found": 0, "failed": 0}
+    flush_lock = asyncio.Lock()
+
+    async def flush(force=False):
+        async with flush_lock:
+            if not force and len(found) + len(missing) < args.batch_size:
+                return
+            rows, misses = found[:], missing[:]
+            found.clear()
+            missing.clear()
+            await asyncio.to_thread(write_posters, engine, rows)
+            no_poster.update(misses)
+            save_checkpoint(args.checkpoint, no_poster)
+
+    async def worker(client):
+        while True:
+            try:
+                movie_id, title = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                poster_url = await get_poster_url(
+                    client, bucket, args.omdb_url, title, args.retries, args.backoff, api_key=args.omdb_api_key,
+                )
+            except Exception as e:
+                # Not checkpointed, so the next run tries this title again
+                print(f"API request failed for {title}: {e}")
+                stats["failed"] += 1
+                continue
+            if poster_url:
+                found.append((movie_id, poster_url))
+                stats["found"] += 1
+            else:
+                missing.append(int(movie_id))
+                stats["not_found"] += 1
+            await flush()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+    await flush(force=True)
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Enrich movies with OMDb poster URLs.')
+    parser.add_argument('--database-url', help='defaults to DATABASE_URL from .env')
+    parser.add_argument('--omdb-url', default=OMDB_API_URL)
+    parser.add_argument('--omdb-api-key', help='defaults to OMDB_API_KEY from .env')
+    parser.add_argument('--concurrency', type=int, default=10, help='requests in flight')
+    parser.add_argument('--rate', type=float, default=10, help='max requests per second')
+    parser.add_argument('--batch-size', type=int, default=50, help='rows per UPDATE/commit')
+    parser.add_argument('--retries', type=int, default=4, help='retries per title on 429/5xx or connection errors')
+    parser.add_argument('--backoff', type=float, default=0.5, help='base delay in seconds, doubled on every retry')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument('--retry-missing', action='store_true', help='ignore the checkpoint and retry titles without a poster')
+    args = parser.parse_args(argv)
+
+    if not args.database_url or not args.omdb_api_key:
+        from src.config import settings
+        args.database_url = args.database_url or settings.database_url
+        args.omdb_api_key = args.omdb_api_key or settings.omdb_api_key
+    if not args.omdb_api_key:
+        parser.error('no OMDb API key: set OMDB_API_KEY or pass --omdb-api-key')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.retry_missing and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    engine = create_engine(args.database_url)
     print("Fetching movies from the database that don't have a poster URL yet...")
-    movies_df = pd.read_sql("SELECT movie_id, title FROM movies WHERE poster_url IS NULL", connection)
-    
+    with engine.connect() as connection:
+        movies_df = pd.read_sql("SELECT movie_id, title FROM movies WHERE poster_url IS NULL", connection)
+    movies_df = movies_df[~movies_df['movie_id'].isin(load_checkpoint(args.checkpoint))]
+
     if movies_df.empty:
         print("All movies already have poster URLs. Exiting.")
-        exit()
+        return
 
     print(f"Found {len(movies_df)} movies to enrich.")
-    
-    for index, row in movies_df.iterrows():
-        movie_id = row['movie_id']
-        title = row['title']
-        
-        print(f"Processing: {title} (ID: {movie_id})")
-        poster_url = get_poster_url(title)
-        
-        if poster_url:
-            # Update the database with the new poster URL
-            update_query = text("UPDATE movies SET poster_url = :poster_url WHERE movie_id = :movie_id")
-            connection.execute(update_query, {"poster_url": poster_url, "movie_id": movie_id})
-            print(f"  -> Found poster URL.")
-        else:
-            print(f"  -> Poster not found.")
-        
-        # OMDb's free tier is limited, so a short delay is good practice
-        time.sleep(0.1) 
-    
-    connection.commit()
-    print("✅ Movie enrichment complete.")
\ No newline at end of file
+    start = time.perf_counter()
+    stats = asyncio.run(enrich(movies_df, engine, args))
+    elapsed = time.perf_counter() - start
+    print(f"✅ Movie enrichment complete: {stats['found']} posters, {stats['not_found']} not found, "
+          f"{stats['failed']} failed in {elapsed:.1f}s ({len(movies_df) / elapsed:.1f} titles/s).")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,31 +1,121 @@
 # scripts/load_data_to_db.py
-import pandas as pd
+# Loads the movie catalogue and the ratings into Postgres with COPY FROM STDIN.
+# Each chunk is copied into a temp staging table and upserted from there, so
+# reruns are idempotent and poster URLs already in `movies` are kept.
+#
+#   python -m scripts.load_data_to_db
+#   python -m scripts.load_data_to_db --movies ml-20m/movies.csv --ratings ml-20m/ratings.csv
+#   python -m scripts.load_data_to_db --database-url postgresql://localhost/movies_test
+import argparse
+import io
+import time
+
 from sqlalchemy import create_engine
-import urllib.parse
-
-# --- PASTE YOUR NEW SUPABASE CREDENTIALS HERE ---
-db_password = "Remo123the"
-db_host = "db.epbqdwygxkvvkljjawnr.supabase.co" # e.g., db.xxxxxxxx.supabase.co
-
-# URL-encode the password to handle special characters
-encoded_password = urllib.parse.quote_plus(db_password)
-DATABASE_URL = f"postgresql://postgres:{encoded_password}@{db_host}:5432/postgres"
-
-engine = create_engine(DATABASE_URL)
-
-print("Loading movies data from CSV file...")
-movies = pd.read_csv(
-    'data/u.item', sep='|', encoding='latin-1', header=None,
-    names=['movie_id', 'title', 'release_date', 'video_release_date', 'imdb_url', 'unknown', 'Action', 'Adventure', 'Animation', 'Childrens', 'Comedy', 'Crime', 'Documentary', 'Drama', 'Fantasy', 'Film-Noir', 'Horror', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western']
-)
-movies['title'] = movies['title'].str.replace(r'\s*\(\d{4}\)$', '', regex=True)
-genre_cols = ['Action', 'Adventure', 'Animation', 'Childrens', 'Comedy', 'Crime', 'Documentary', 'Drama', 'Fantasy', 'Film-Noir', 'Horror', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western']
-movies['genres'] = movies[genre_cols].apply(lambda row: '|'.join(row.index[row == 1]), axis=1)
-movies_to_load = movies[['movie_id', 'title', 'genres']]
-
-print("Uploading movie data to the PostgreSQL database...")
-try:
-    movies_to_load.to_sql('movies', engine, if_exists='append', index=False)
-    print("✅ Data uploaded successfully to the 'movies' table.")
-except Exception as e:
-    print(f"❌ An error occurred: {e}")
\ No newline at end of file
+from sqlalchemy.engine import make_url
+
+from src.movielens import load_movies, load_ratings
+
+CREATE_TABLES = """
+CREATE TABLE IF NOT EXISTS movies (
+    movie_id integer PRIMARY KEY,
+    title text NOT NULL,
+    genres text,
+    poster_url text
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    user_id integer NOT NULL,
+    movie_id integer NOT NULL,
+    rating real NOT NULL,
+    rated_at timestamptz,
+    PRIMARY KEY (user_id, movie_id)
+);
+"""
+
+MOVIES_UPSERT = """
+INSERT INTO movies (movie_id, title, genres)
+SELECT DISTINCT ON (movie_id) movie_id, title, genres FROM movies_staging
+ON CONFLICT (movie_id) DO UPDATE SET title = EXCLUDED.title, genres = EXCLUDED.genres
+"""
+
+RATINGS_UPSERT = """
+INSERT INTO ratings (user_id, movie_id, rating, rated_at)
+SELECT DISTINCT ON (user_id, movie_id) user_id, movie_id, rating, to_timestamp(ts) FROM ratings_staging
+ORDER BY user_id, movie_id, ts DESC
+ON CONFLICT (user_id, movie_id) DO UPDATE SET rating = EXCLUDED.rating, rated_at = EXCLUDED.rated_at
+"""
+
+
+def copy_frame(cursor, frame, table):
+    """Streams a DataFrame into `table` as CSV through COPY FROM STDIN."""
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def load_movies_table(connection, path):
+    movies = load_movies(path)[['movie_id', 'title', 'genres']]
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE TEMP TABLE movies_staging (movie_id integer, title text, genres text) ON COMMIT DROP")
+        copy_frame(cursor, movies, 'movies_staging')
+        cursor.execute(MOVIES_UPSERT)
+    connection.commit()
+    return len(movies)
+
+
+def load_ratings_table(connection, path, chunksize):
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE TEMP TABLE ratings_staging (user_id integer, movie_id integer, rating real, ts bigint)")
+        for chunk in load_ratings(path, chunksize=chunksize):
+            chunk = chunk.rename(columns={'item_id': 'movie_id', 'timestamp': 'ts'})
+            cursor.execute("TRUNCATE ratings_staging")
+            copy_frame(cursor, chunk, 'ratings_staging')
+            cursor.execute(RATINGS_UPSERT)
+            connection.commit()
+            total += len(chunk)
+            print(f"  ... {total:,} ratings")
+        cursor.execute("DROP TABLE ratings_staging")
+    connection.commit()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk-load MovieLens movies and ratings into Postgres.')
+    parser.add_argument('--database-url', help='defaults to DATABASE_URL from .env')
+    parser.add_argument('--movies', default='data/u.item', help='u.item or movies.csv')
+    parser.add_argument('--ratings', default='data/u.data', help='u.data or ratings.csv')
+    parser.add_argument('--skip-ratings', action='store_true')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='ratings rows per COPY/commit')
+    args = parser.parse_args()
+
+    if args.database_url:
+        database_url = args.database_url
+    else:
+        from src.config import settings
+        database_url = settings.database_url
+    # COPY goes through psycopg2's copy_expert on the raw DB-API connection.
+    engine = create_engine(make_url(database_url).set(drivername='postgresql+psycopg2'))
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_TABLES)
+        connection.commit()
+
+        start = time.perf_counter()
+        print("Loading movies...")
+        n_movies = load_movies_table(connection, args.movies)
+        print(f"✅ {n_movies:,} movies upserted in {time.perf_counter() - start:.1f}s.")
+
+        if not args.skip_ratings:
+            start = time.perf_counter()
+            print("Loading ratings...")
+            n_ratings = load_ratings_table(connection, args.ratings, args.chunksize)
+            elapsed = time.perf_counter() - start
+            print(f"✅ {n_ratings:,} ratings upserted in {elapsed:.1f}s ({n_ratings / elapsed:,.0f} rows/s).")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
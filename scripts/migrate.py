@@ -0,0 +1,56 @@
+# scripts/migrate.py
+# Applies migrations/*.sql in filename order, once each. Applied files are
+# recorded in schema_migrations, so reruns only pick up new ones.
+#
+#   python -m scripts.migrate
+#   python -m scripts.migrate --database-url postgresql://localhost/movies_test
+import argparse
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+MIGRATIONS_DIR = 'migrations'
+
+
+def pending_migrations(cursor, directory):
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations (name text PRIMARY KEY, applied_at timestamptz NOT NULL DEFAULT now())"
+    )
+    cursor.execute("SELECT name FROM schema_migrations")
+    applied = {row[0] for row in cursor.fetchall()}
+    return [name for name in sorted(os.listdir(directory)) if name.endswith('.sql') and name not in applied]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply pending SQL migrations.')
+    parser.add_argument('--database-url', help='defaults to DATABASE_URL from .env')
+    parser.add_argument('--dir', default=MIGRATIONS_DIR)
+    args = parser.parse_args()
+
+    if args.database_url:
+        database_url = args.database_url
+    else:
+        from src.config import settings
+        database_url = settings.database_url
+    engine = create_engine(make_url(database_url).set(drivername='postgresql+psycopg2'))
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            names = pending_migrations(cursor, args.dir)
+            connection.commit()
+            for name in names:
+                # Each file runs in its own transaction together with its bookkeeping row.
+                with open(os.path.join(args.dir, name)) as f:
+                    cursor.execute(f.read())
+                cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+                connection.commit()
+                print(f"✅ Applied {name}")
+        if not names:
+            print("Database is up to date.")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
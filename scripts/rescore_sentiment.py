@@ -0,0 +1,95 @@
+# scripts/rescore_sentiment.py
+# Re-scores reviews.sentiment in bulk. Rows are read in keyset-paginated
+# chunks, distinct texts are scored across a process pool while the next
+# chunk is being read, and labels are written back with one
+# UPDATE ... FROM (VALUES ...) per batch.
+#
+#   python -m scripts.rescore_sentiment              # only rows still pending (NULL)
+#   python -m scripts.rescore_sentiment --all --workers 8
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import create_engine, text
+
+from src.sentiment import score_texts
+
+
+def read_chunk(engine, after_id, chunk_size, rescore_all):
+    condition = "" if rescore_all else "AND sentiment IS NULL "
+    query = text(
+        "SELECT review_id, review_text FROM reviews "
+        f"WHERE review_id > :after_id {condition}"
+        "ORDER BY review_id LIMIT :limit"
+    )
+    with engine.connect() as connection:
+        return connection.execute(query, {"after_id": after_id, "limit": chunk_size}).fetchall()
+
+
+def score_chunk(pool, rows, workers):
+    """Scores each distinct text once, split evenly over the pool."""
+    texts = sorted({row[1] or "" for row in rows})
+    step = max(1, -(-len(texts) // workers))
+    parts = [texts[i:i + step] for i in range(0, len(texts), step)]
+    futures = [pool.submit(score_texts, part) for part in parts]
+
+    def result():
+        labels = {}
+        for part, future in zip(parts, futures):
+            labels.update(zip(part, future.result()))
+        return [(review_id, labels[review_text or ""]) for review_id, review_text in rows]
+
+    return result
+
+
+def write_labels(engine, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        values = ", ".join(f"(:id{i}, :label{i})" for i in range(len(batch)))
+        params = {}
+        for i, (review_id, label) in enumerate(batch):
+            params[f"id{i}"] = review_id
+            params[f"label{i}"] = label
+        query = text(
+            "UPDATE reviews SET sentiment = v.sentiment "
+            f"FROM (VALUES {values}) AS v(review_id, sentiment) "
+            "WHERE reviews.review_id = v.review_id"
+        )
+        with engine.begin() as connection:
+            connection.execute(query, params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk re-score review sentiment.')
+    parser.add_argument('--database-url', help='defaults to DATABASE_URL from .env')
+    parser.add_argument('--all', action='store_true', help='re-score every review, not just pending ones')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows read per query')
+    parser.add_argument('--batch-size', type=int, default=500, help='rows per UPDATE/commit')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        from src.database import engine
+
+    start = time.perf_counter()
+    total = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        rows = read_chunk(engine, 0, args.chunk_size, args.all)
+        while rows:
+            pending = score_chunk(pool, rows, args.workers)
+            # Read ahead while the pool scores the current chunk.
+            next_rows = read_chunk(engine, rows[-1][0], args.chunk_size, args.all)
+            labelled = pending()
+            write_labels(engine, labelled, args.batch_size)
+            total += len(labelled)
+            print(f"  ... {total:,} reviews")
+            rows = next_rows
+    elapsed = time.perf_counter() - start
+    print(f"✅ Re-scored {total:,} reviews in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} reviews/s).")
+
+
+if __name__ == '__main__':
+    main()
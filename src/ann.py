@@ -0,0 +1,147 @@
+# src/ann.py
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from .scoring import top_n
+
+
+def unit_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def nearest_centroids(vectors, centroids, block_size=8192):
+    """Index of the most similar centroid for each (unit) row, computed in row blocks."""
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_size):
+        assign[start:start + block_size] = np.argmax(vectors[start:start + block_size] @ centroids.T, axis=1)
+    return assign
+
+
+def spherical_kmeans(vectors, n_lists, n_iters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)]
+    for _ in range(n_iters):
+        assign = nearest_centroids(vectors, centroids)
+        one_hot = csr_matrix((np.ones(len(assign)), (assign, np.arange(len(assign)))), shape=(n_lists, len(vectors)))
+        sums = np.asarray(one_hot @ vectors, dtype=np.float32)
+        # Re-seed empty lists with random points rather than dropping them.
+        empty = np.flatnonzero(np.bincount(assign, minlength=n_lists) == 0)
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids = unit_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file index for cosine nearest neighbours over item factors.
+
+    The unit-normalised vectors are clustered with spherical k-means and
+    stored grouped by cluster, so a query scores the centroids, then only the
+    vectors of its `nprobe` closest clusters. Cost is about
+    (n_lists + nprobe * n / n_lists) dot products instead of n; nprobe trades
+    recall against latency, and nprobe >= n_lists is an exact scan.
+
+    `items` maps each stored row back to its catalogue position. Positions
+    without factors (items the SVD never saw) are simply not indexed.
+    """
+
+    def __init__(self, centroids, indptr, items, vectors, n_positions):
+        self.centroids = centroids
+        self.indptr = indptr
+        self.items = items
+        self.vectors = vectors
+        self.row_of = np.full(n_positions, -1, dtype=np.int64)
+        self.row_of[np.asarray(items)] = np.arange(len(items))
+
+    @classmethod
+    def build(cls, vectors, positions, n_positions, n_lists=None, n_iters=20, seed=0):
+        """Clusters `vectors` (one per catalogue position in `positions`) into about sqrt(n) lists."""
+        vectors = unit_rows(vectors)
+        n_lists = min(n_lists or max(1, int(round(np.sqrt(len(vectors))))), len(vectors))
+        # k-means only needs a sample to place the centroids.
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), min(len(vectors), 64 * n_lists), replace=False)]
+        centroids = spherical_kmeans(sample, n_lists, n_iters=n_iters, seed=seed)
+        return cls.from_assignment(centroids, nearest_centroids(vectors, centroids), np.asarray(positions), vectors, n_positions)
+
+    @classmethod
+    def from_assignment(cls, centroids, assign, positions, vectors, n_positions):
+        order = np.argsort(assign, kind='stable')
+        indptr = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=len(centroids)), out=indptr[1:])
+        return cls(centroids, indptr, positions[order].astype(np.int32), vectors[order], n_positions)
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        return cls(bundle.ann_centroids, bundle.ann_indptr, bundle.ann_items, bundle.ann_vectors, len(bundle.movie_ids))
+
+    def arrays(self):
+        return {
+            'ann_centroids': self.centroids,
+            'ann_indptr': self.indptr,
+            'ann_items': self.items,
+            'ann_vectors': self.vectors,
+        }
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def with_items(self, positions, vectors):
+        """A new index with extra (or re-trained) positions assigned to the existing lists."""
+        positions = np.asarray(positions)
+        keep = ~np.isin(self.items, positions)
+        old_assign = np.repeat(np.arange(self.n_lists), np.diff(self.indptr))[keep]
+        vectors = unit_rows(vectors)
+        return self.from_assignment(
+            self.centroids,
+            np.concatenate([old_assign, nearest_centroids(vectors, self.centroids)]),
+            np.concatenate([np.asarray(self.items)[keep], positions]),
+            np.concatenate([np.asarray(self.vectors)[keep], vectors]),
+            len(self.row_of),
+        )
+
+    def contains(self, position):
+        return self.row_of[position] >= 0
+
+    def search(self, query, n=10, nprobe=None, allowed=None, exclude=None):
+        """Returns (positions, cosine scores) of the n rows closest to a unit `query`.
+
+        nprobe=None scans every list (exact search). `allowed` is an optional
+        boolean mask over catalogue positions; `exclude` a position to skip.
+        """
+        if nprobe is None or nprobe >= self.n_lists:
+            items = np.asarray(self.items)
+            scores = np.asarray(self.vectors) @ query
+        else:
+            # Lists are contiguous row ranges, so each is scored as a view, without gathering.
+            bounds = [(self.indptr[l], self.indptr[l + 1]) for l in top_n(np.asarray(self.centroids) @ query, nprobe)]
+            items = np.concatenate([self.items[start:stop] for start, stop in bounds])
+            scores = np.concatenate([self.vectors[start:stop] @ query for start, stop in bounds])
+        if exclude is not None:
+            scores[items == exclude] = -np.inf
+        if allowed is not None:
+            scores[~allowed[items]] = -np.inf
+        best = top_n(scores, n)
+        return items[best], scores[best]
+
+    def neighbours(self, position, n=10, nprobe=None, allowed=None):
+        """Items whose factors are closest to the given catalogue position's, itself excluded."""
+        query = np.asarray(self.vectors[self.row_of[position]])
+        return self.search(query, n=n, nprobe=nprobe, allowed=allowed, exclude=position)
+
+
+def measure_recall(index, nprobes, n=10, n_queries=200, seed=0):
+    """Mean recall@n of IVF search against exact search, for each nprobe."""
+    rng = np.random.default_rng(seed)
+    queries = rng.choice(np.asarray(index.items), min(n_queries, len(index.items)), replace=False)
+    exact = {position: set(index.neighbours(position, n)[0].tolist()) for position in queries}
+    recall = {}
+    for nprobe in nprobes:
+        hits = []
+        for position in queries:
+            found = index.neighbours(position, n, nprobe=nprobe)[0]
+            hits.append(len(exact[position].intersection(found.tolist())) / max(len(exact[position]), 1))
+        recall[nprobe] = float(np.mean(hits))
+    return recall
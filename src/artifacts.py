@@ -0,0 +1,149 @@
+# src/artifacts.py
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from .scoring import SVDScorer
+from .user_index import UserItemIndex
+
+ARTIFACTS_DIR = os.environ.get('ARTIFACTS_DIR', 'src/artifacts')
+BUNDLE_FORMAT = 3
+
+# Arrays written as individual .npy files so they can be memory-mapped.
+ARRAY_NAMES = [
+    'movie_ids',
+    'user_ids',
+    'pu', 'bu', 'qi', 'bi', 'item_known',
+    'tfidf_data', 'tfidf_indices', 'tfidf_indptr',
+    'rated_indptr', 'rated_items', 'rated_values',
+    'similar_items', 'similar_scores',
+    'ann_centroids', 'ann_indptr', 'ann_items', 'ann_vectors',
+    'item_genres', 'popular_indptr', 'popular_items', 'top_rated_indptr', 'top_rated_items',
+]
+
+
+class ModelBundle:
+    """A loaded artifact bundle: plain NumPy arrays plus the metadata dict.
+
+    Every item-indexed array is aligned to `movie_ids` (catalogue order, i.e.
+    the rows of movies_df), and every user-indexed array to `user_ids`.
+    """
+
+    def __init__(self, path, metadata, arrays):
+        self.path = path
+        self.metadata = metadata
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.tfidf_matrix = csr_matrix(
+            (self.tfidf_data, self.tfidf_indices, self.tfidf_indptr),
+            shape=tuple(metadata['tfidf_shape']), copy=False,
+        )
+
+    @property
+    def version(self):
+        return self.metadata['version']
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in ARRAY_NAMES}
+
+
+def export_bundle(svd, movies, ratings, tfidf_matrix, similar_items, similar_scores, ann_index, popularity, root=ARTIFACTS_DIR, extra_metadata=None):
+    """Writes a new versioned bundle under `root` and points `root/CURRENT` at it."""
+    movie_ids = movies['movie_id'].to_numpy(dtype=np.int64)
+    scorer = SVDScorer.from_svd(svd, movie_ids.tolist())
+    user_ids = np.array(list(scorer.user_index), dtype=str)
+    rated = UserItemIndex.from_ratings(ratings, user_ids, movie_ids)
+    tfidf_matrix = csr_matrix(tfidf_matrix)
+
+    arrays = {
+        'movie_ids': movie_ids,
+        'user_ids': user_ids,
+        'pu': scorer.pu.astype(np.float32),
+        'bu': scorer.bu.astype(np.float32),
+        'qi': scorer.qi.astype(np.float32),
+        'bi': scorer.bi.astype(np.float32),
+        'item_known': scorer.item_known,
+        'tfidf_data': tfidf_matrix.data.astype(np.float32),
+        'tfidf_indices': tfidf_matrix.indices.astype(np.int32),
+        'tfidf_indptr': tfidf_matrix.indptr.astype(np.int64),
+        'rated_indptr': rated.indptr,
+        'rated_items': rated.items,
+        'rated_values': rated.values,
+        'similar_items': similar_items,
+        'similar_scores': similar_scores,
+        **ann_index.arrays(),
+        **popularity.arrays(),
+    }
+    metadata = {
+        'format': BUNDLE_FORMAT,
+        'version': new_version(),
+        'created_at': time.time(),
+        'global_mean': float(scorer.global_mean),
+        'rating_scale': list(scorer.rating_scale),
+        'n_users': len(user_ids),
+        'n_items': len(movie_ids),
+        'n_factors': int(scorer.qi.shape[1]),
+        'tfidf_shape': list(tfidf_matrix.shape),
+        'ann_lists': ann_index.n_lists,
+    }
+    metadata.update(extra_metadata or {})
+    return write_bundle(arrays, metadata, root)
+
+
+def new_version():
+    now = time.time()
+    return time.strftime('%Y%m%dT%H%M%S', time.gmtime(now)) + f'{int(now * 1000) % 1000:03d}'
+
+
+def write_bundle(arrays, metadata, root=ARTIFACTS_DIR):
+    """Writes arrays + metadata to a fresh version directory, then flips CURRENT atomically."""
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=root)
+    for name, array in arrays.items():
+        np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(array))
+    with open(os.path.join(staging, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    target = os.path.join(root, metadata['version'])
+    if os.path.exists(target):
+        shutil.rmtree(target)
+    os.rename(staging, target)
+    pointer = os.path.join(root, 'CURRENT.tmp')
+    with open(pointer, 'w') as f:
+        f.write(metadata['version'])
+    os.replace(pointer, os.path.join(root, 'CURRENT'))
+    return target
+
+
+def prune_bundles(root=ARTIFACTS_DIR, keep=3):
+    """Deletes all but the newest `keep` versions (never the CURRENT one).
+
+    Workers still mapping a deleted version keep working: the pages stay
+    valid until they unmap them on their next reload.
+    """
+    current = os.path.basename(current_bundle_path(root))
+    versions = sorted(name for name in os.listdir(root) if not name.startswith(('.', 'CURRENT')))
+    for name in versions[:-keep]:
+        if name != current:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def current_bundle_path(root=ARTIFACTS_DIR):
+    with open(os.path.join(root, 'CURRENT')) as f:
+        return os.path.join(root, f.read().strip())
+
+
+def load_bundle(path=None, mmap_mode='r'):
+    """Loads a bundle (the CURRENT one by default) with every array memory-mapped."""
+    path = path or current_bundle_path()
+    with open(os.path.join(path, 'metadata.json')) as f:
+        metadata = json.load(f)
+    if metadata['format'] != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported artifact bundle format {metadata['format']} in {path}")
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+    return ModelBundle(path, metadata, arrays)
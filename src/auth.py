@@ -0,0 +1,91 @@
+# src/auth.py
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import jwt
+
+from .cache import LRUCache
+
+ALLOWED_ALGORITHMS = {"HS256", "RS256", "ES256"}
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    id: str
+    email: Optional[str] = None
+
+
+class TokenUnverifiable(Exception):
+    """Raised when a token can't be checked locally (no key available for it)."""
+
+
+class TokenVerifier:
+    """Verifies Supabase access tokens locally instead of calling the auth server.
+
+    HS256 tokens are checked against the project's JWT secret; asymmetrically
+    signed tokens against the project's JWKS, which is cached and refreshed
+    every `jwks_ttl` seconds. Tokens that already passed are remembered until
+    they expire, so repeat requests skip signature checks entirely.
+    """
+
+    def __init__(self, jwks_url, jwt_secret=None, audience="authenticated", jwks_ttl=600.0, cache_size=10000, leeway=0):
+        self.jwt_secret = jwt_secret
+        self.audience = audience
+        self.leeway = leeway
+        self.jwks_client = jwt.PyJWKClient(jwks_url, cache_keys=True, lifespan=jwks_ttl, timeout=5)
+        self.validated = LRUCache(cache_size)
+
+    def cached(self, token):
+        """Returns the user for an already-validated, unexpired token, else None."""
+        entry = self.validated.get(token)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            self.validated.pop(token)
+            return None
+        return user
+
+    def remember(self, token, user, expires_at):
+        self.validated.set(token, (user, expires_at))
+
+    def signing_key(self, token):
+        algorithm = jwt.get_unverified_header(token).get("alg")
+        if algorithm not in ALLOWED_ALGORITHMS:
+            raise jwt.InvalidAlgorithmError(f"Unsupported signing algorithm: {algorithm}")
+        if algorithm == "HS256":
+            if not self.jwt_secret:
+                raise TokenUnverifiable("No JWT secret configured for HS256 tokens")
+            return self.jwt_secret, algorithm
+        try:
+            signing_key = self.jwks_client.get_signing_key_from_jwt(token)
+        except jwt.PyJWKClientError as e:
+            raise TokenUnverifiable(str(e)) from e
+        # The kid picks the key, so the header's alg must be that key's algorithm.
+        if signing_key.algorithm_name != algorithm:
+            raise jwt.InvalidAlgorithmError(f"Key {signing_key.key_id} is not an {algorithm} key")
+        return signing_key.key, algorithm
+
+    def verify(self, token):
+        """Returns the token's user, validating it unless it's already cached."""
+        return self.cached(token) or self.validate(token)
+
+    def validate(self, token):
+        """Checks signature, expiry and audience. Raises jwt.PyJWTError on a bad token."""
+        key, algorithm = self.signing_key(token)
+        try:
+            claims = jwt.decode(
+                token, key, algorithms=[algorithm], audience=self.audience,
+                leeway=self.leeway, options={"require": ["exp", "sub"]},
+            )
+        except TypeError as e:
+            # A key of the wrong type for the algorithm.
+            raise jwt.InvalidKeyError(str(e)) from e
+        user = AuthUser(id=claims["sub"], email=claims.get("email"))
+        self.remember(token, user, claims["exp"])
+        return user
+
+
+def unverified_expiry(token):
+    return jwt.decode(token, options={"verify_signature": False}).get("exp", 0)
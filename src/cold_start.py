@@ -0,0 +1,136 @@
+# src/cold_start.py
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from .movielens import GENRE_COLS
+from .scoring import top_n
+from .updater import ridge_solve
+
+RANKINGS = ('popular', 'top_rated')
+
+
+def bayesian_average(counts, sums, prior_mean, prior_weight):
+    """Mean rating shrunk towards `prior_mean` as if every item had `prior_weight` extra votes at it."""
+    return (prior_weight * prior_mean + sums) / (prior_weight + counts)
+
+
+class PopularityRankings:
+    """Per-genre top-K lists built at training time, for users the model can't score.
+
+    Two rankings are kept, each as CSR-style (indptr, items) over buckets:
+    bucket 0 is the whole catalogue, bucket 1 + g genre GENRE_COLS[g].
+    `popular` orders items by number of ratings, `top_rated` by Bayesian
+    average, so a film with three 5-star votes doesn't outrank a well-loved
+    classic. Serving a list is a slice, independent of catalogue size.
+    """
+
+    def __init__(self, item_genres, tables):
+        self.item_genres = item_genres
+        self.tables = tables
+
+    @classmethod
+    def build(cls, ratings, movies, top_k=200, prior_weight=None):
+        """`prior_weight` defaults to the median number of ratings per rated item."""
+        movie_ids = movies['movie_id'].to_numpy()
+        positions = pd.Index(movie_ids).get_indexer(ratings['item_id'])
+        keep = positions >= 0
+        positions, values = positions[keep], ratings['rating'].to_numpy(dtype=np.float64)[keep]
+        counts = np.bincount(positions, minlength=len(movie_ids)).astype(np.float64)
+        sums = np.bincount(positions, weights=values, minlength=len(movie_ids))
+        if prior_weight is None:
+            prior_weight = float(np.median(counts[counts > 0])) if counts.any() else 1.0
+        prior_mean = values.mean() if len(values) else 0.0
+
+        scores = {
+            'popular': counts,
+            'top_rated': bayesian_average(counts, sums, prior_mean, prior_weight),
+        }
+        item_genres = movies[GENRE_COLS].to_numpy() == 1
+        members = [np.flatnonzero(counts > 0)] + [np.flatnonzero(item_genres[:, g] & (counts > 0)) for g in range(len(GENRE_COLS))]
+        tables = {}
+        for ranking, score in scores.items():
+            lists = [bucket[top_n(score[bucket], top_k)] for bucket in members]
+            indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+            np.cumsum([len(items) for items in lists], out=indptr[1:])
+            tables[ranking] = (indptr, np.concatenate(lists).astype(np.int32))
+        return cls(item_genres, tables)
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        tables = {ranking: (getattr(bundle, f'{ranking}_indptr'), getattr(bundle, f'{ranking}_items')) for ranking in RANKINGS}
+        return cls(bundle.item_genres, tables)
+
+    def arrays(self):
+        arrays = {'item_genres': self.item_genres}
+        for ranking, (indptr, items) in self.tables.items():
+            arrays[f'{ranking}_indptr'] = indptr
+            arrays[f'{ranking}_items'] = items
+        return arrays
+
+    def bucket(self, ranking, bucket):
+        indptr, items = self.tables[ranking]
+        return items[indptr[bucket]:indptr[bucket + 1]]
+
+    def top(self, ranking, n=10, genres=(), exclude=()):
+        """Up to n positions: the given genre buckets interleaved, then the overall list."""
+        genre_lists = [self.bucket(ranking, 1 + g) for g in genres]
+        candidates = itertools.chain(
+            (position for row in itertools.zip_longest(*genre_lists) for position in row if position is not None),
+            self.bucket(ranking, 0),
+        )
+        seen = set(np.asarray(exclude).tolist())
+        picked = []
+        for position in candidates:
+            position = int(position)
+            if position not in seen:
+                seen.add(position)
+                picked.append(position)
+                if len(picked) == n:
+                    break
+        return np.array(picked, dtype=np.int64)
+
+
+class ColdStartRecommender:
+    """Recommendations for users the served model has no factors for.
+
+    Users with at least `min_ratings` ratings get a user vector folded in
+    against the item factors (one small ridge solve, as in the updater) and
+    are scored like anyone else. Below that, the user's liked genres pick
+    buckets from the precomputed rankings, which costs the same whatever the
+    catalogue size; with no likes at all it's the overall ranking.
+    """
+
+    def __init__(self, scorer, rankings, ranking='top_rated', min_ratings=5, reg=0.1, min_rating=4, max_genres=3):
+        self.scorer = scorer
+        self.rankings = rankings
+        self.ranking = ranking
+        self.min_ratings = min_ratings
+        self.reg = reg
+        self.min_rating = min_rating
+        self.max_genres = max_genres
+
+    def fold_in(self, positions, ratings):
+        """Returns (pu, bu) for a user from their (catalogue position, rating) pairs."""
+        features = np.hstack([self.scorer.qi[positions], np.ones((len(positions), 1))])
+        solution = ridge_solve(features, ratings - self.scorer.global_mean - self.scorer.bi[positions], self.reg)
+        return solution[:-1], solution[-1]
+
+    def liked_genres(self, positions, ratings):
+        """Indices into GENRE_COLS of the user's liked items' genres, most frequent first."""
+        counts = self.rankings.item_genres[positions[ratings >= self.min_rating]].sum(axis=0)
+        order = np.argsort(-counts, kind='stable')
+        return [int(g) for g in order[:self.max_genres] if counts[g] > 0]
+
+    def recommend(self, positions, ratings, n=10):
+        """Top-n catalogue positions for a user known only by their ratings; rated items excluded."""
+        positions = np.asarray(positions, dtype=np.int64)
+        ratings = np.asarray(ratings, dtype=np.float64)
+        known = self.scorer.item_known[positions]
+        if known.sum() >= self.min_ratings:
+            pu, bu = self.fold_in(positions[known], ratings[known])
+            scores = self.scorer.global_mean + self.scorer.bi + bu + self.scorer.qi @ pu
+            scores[positions] = -np.inf
+            return top_n(scores, n)
+        return self.rankings.top(self.ranking, n, self.liked_genres(positions, ratings), exclude=positions)
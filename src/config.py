@@ -1,4 +1,5 @@
 # src/config.py
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -6,6 +7,68 @@ class Settings(BaseSettings):
     supabase_url: str
     supabase_key: str
 
+    # Local JWT verification (falls back to the Supabase auth API when a token
+    # can't be checked locally, e.g. no secret and the JWKS is unreachable)
+    supabase_jwt_secret: Optional[str] = None
+    jwt_audience: str = "authenticated"
+    jwks_cache_ttl: float = 600.0
+    token_cache_size: int = 10000
+
+    # Database connection pool
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 5000
+
+    # Seconds between checks for a newer artifact bundle (0 disables hot-swapping)
+    model_reload_interval: float = 30.0
+
+    # Hybrid re-ranking
+    hybrid_svd_weight: float = 0.5
+    hybrid_content_weight: float = 0.5
+    hybrid_candidate_pool: int = 50
+
+    # Lists probed by the collaborative "similar movies" ANN search (more = better recall, slower)
+    ann_nprobe: int = 8
+    # Below this many indexed items an exact scan is as fast as probing, so it's the default
+    ann_exact_max_items: int = 20000
+
+    # Users the model has no factors for: with at least cold_start_min_ratings
+    # reviews they get a folded-in user vector, otherwise a precomputed
+    # per-genre ranking ("top_rated" = Bayesian average, or "popular")
+    cold_start_ranking: Literal["popular", "top_rated"] = "top_rated"
+    cold_start_min_ratings: int = 5
+    cold_start_reg: float = 0.1
+
+    # POST /recommendations/batch is for internal jobs: callers must send this
+    # key as X-Service-Key (the endpoint is disabled while it's unset)
+    service_api_key: Optional[str] = None
+    batch_max_users: int = 10000
+
+    # Per-user recommendation cache
+    recommendation_cache_size: int = 4096
+    recommendation_cache_ttl: float = 900.0
+
+    # Serialized responses of read-mostly, user-independent endpoints
+    # (search, similar movies), revalidated with ETags.
+    response_cache_size: int = 4096
+    response_cache_ttl: float = 300.0
+
+    # Review sentiment scoring (off the request path, memoised by text hash)
+    sentiment_cache_size: int = 10000
+    sentiment_workers: int = 2
+    sentiment_use_processes: bool = False
+
+    # Sampling profiler: requests slower than this many ms get their stacks
+    # dumped as folded files into profile_dir (0 disables profiling)
+    profile_slow_request_ms: float = 0.0
+    profile_interval_ms: float = 5.0
+    profile_dir: str = "profiles"
+
+    # Used by scripts/enrich_movie_data.py to fetch posters
+    omdb_api_key: Optional[str] = None
+
     class Config:
         env_file = ".env"
 
@@ -1,10 +1,45 @@
 # src/database.py
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from supabase import create_client, Client
 from .config import settings
+from .metrics import instrument_engine
 
 # Client for authentication
 supabase: Client = create_client(settings.supabase_url, settings.supabase_key)
 
-# Engine for direct database access
-engine = create_engine(settings.database_url)
\ No newline at end of file
+database_url = make_url(settings.database_url)
+is_postgres = database_url.get_backend_name() == "postgresql"
+
+# SQLite (used as a local stand-in) manages its own pooling and has no statement timeout.
+pool_options = {"pool_pre_ping": settings.db_pool_pre_ping}
+if is_postgres:
+    pool_options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+
+# Engine for direct database access (scripts and background jobs)
+engine = create_engine(
+    database_url,
+    connect_args={"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"} if is_postgres else {},
+    **pool_options,
+)
+
+# Async engine used by the API handlers, so SQL waits don't tie up the threadpool
+if is_postgres:
+    async_engine = create_async_engine(
+        database_url.set(drivername="postgresql+asyncpg"),
+        connect_args={"server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}},
+        **pool_options,
+    )
+else:
+    async_engine = create_async_engine(
+        database_url.set(drivername="sqlite+aiosqlite"),
+        **pool_options,
+    )
+
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
@@ -1,27 +1,95 @@
 # src/main.py
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+import hmac
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional, Union
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Depends, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import joblib
+import jwt
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import linear_kernel
 from sqlalchemy import text
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from sqlalchemy.exc import SQLAlchemyError
 
-from .database import supabase, engine
+from .auth import AuthUser, TokenUnverifiable, TokenVerifier, unverified_expiry
+from .cache import LRUCache
+from .config import settings
+from .database import supabase, engine, async_engine, is_postgres
+from .metrics import HANDLED_ERRORS, REQUEST_SECONDS, CounterValue, Gauge, render, stage
+from .movielens import GENRE_COLS
+from .profiler import SamplingProfiler
+from .response_cache import CachedResponse, ResponseCache
+from .search import TitleIndex, decode_cursor, encode_cursor
+from .sentiment import SentimentScorer
+from .serving import NO_RATINGS, ModelStore
+from .updater import fetch_user_reviews
 
-app = FastAPI(title="Movie Recommender API")
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    watcher = asyncio.create_task(watch_model_artifacts()) if settings.model_reload_interval > 0 else None
+    yield
+    if watcher:
+        watcher.cancel()
+    sentiment_scorer.shutdown()
+
+app = FastAPI(title="Movie Recommender API", lifespan=lifespan)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    if settings.profile_slow_request_ms > 0:
+        with SamplingProfiler(settings.profile_interval_ms / 1000) as profiler:
+            response = await call_next(request)
+    else:
+        profiler = None
+        response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    route_path = route.path if route else "unmatched"
+    REQUEST_SECONDS.observe(elapsed, method=request.method, route=route_path, status=response.status_code)
+    if profiler and elapsed * 1000 >= settings.profile_slow_request_ms:
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{elapsed * 1000:.0f}ms-{request.method}{route_path}".replace("/", "_")
+        profiler.dump(os.path.join(settings.profile_dir, f"{name}.folded"))
+    return response
 
 # --- Load ML Models & Data ---
-# (This section remains the same)
-svd = joblib.load('src/svd_model.joblib')
 movies_df = joblib.load('src/movies_df.joblib')
-ratings_df = joblib.load('src/ratings_df.joblib')
-tfidf_matrix = joblib.load('src/tfidf_matrix.joblib')
 indices = pd.Series(movies_df.index, index=movies_df['movie_id'])
-sentiment_analyzer = SentimentIntensityAnalyzer()
+title_index = TitleIndex(movies_df['title'])
+GENRE_LOOKUP = {genre.lower(): genre for genre in GENRE_COLS}
+# The artifact bundle is memory-mapped, so workers share its pages via the OS cache.
+# Incremental updates publish new bundles; model_store swaps them in without a restart.
+model_store = ModelStore(
+    movie_ids=movies_df['movie_id'].to_numpy(),
+    svd_weight=settings.hybrid_svd_weight,
+    content_weight=settings.hybrid_content_weight,
+    candidate_pool=settings.hybrid_candidate_pool,
+    cold_start_ranking=settings.cold_start_ranking,
+    cold_start_min_ratings=settings.cold_start_min_ratings,
+    cold_start_reg=settings.cold_start_reg,
+)
+sentiment_scorer = SentimentScorer(
+    cache_size=settings.sentiment_cache_size,
+    workers=settings.sentiment_workers,
+    use_processes=settings.sentiment_use_processes,
+)
+# Final ranked lists and intermediate user profiles, keyed by user.
+# Entries are evicted whenever that user writes or updates a review.
+recommendation_cache = LRUCache(settings.recommendation_cache_size, settings.recommendation_cache_ttl)
+profile_cache = LRUCache(settings.recommendation_cache_size, settings.recommendation_cache_ttl)
+# Ready-to-send JSON bytes + ETags for /movies/ and /movies/{id}/similar.
+# Similarity entries are keyed on the model version.
+response_cache = ResponseCache(settings.response_cache_size, settings.response_cache_ttl)
 
 # --- Pydantic Models ---
 class UserCredentials(BaseModel):
@@ -37,16 +105,83 @@ class ReviewUpdate(BaseModel): # New model for updating
     rating: int
     review_text: Optional[str] = None
 
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[Union[int, str]] = Field(..., max_length=settings.batch_max_users)
+    n: int = Field(10, ge=1, le=100)
+
 # --- Authentication ---
-# (This section remains the same)
 bearer_scheme = HTTPBearer()
+token_verifier = TokenVerifier(
+    f"{settings.supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json",
+    jwt_secret=settings.supabase_jwt_secret,
+    audience=settings.jwt_audience,
+    jwks_ttl=settings.jwks_cache_ttl,
+    cache_size=settings.token_cache_size,
+)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+    token = credentials.credentials
+    with stage("auth", "token_cache"):
+        user = token_verifier.cached(token)
+    if user is not None:
+        return user
+    try:
+        # Off the event loop: a JWKS refresh is a (rare) blocking fetch
+        with stage("auth", "validate"):
+            return await run_in_threadpool(token_verifier.validate, token)
+    except TokenUnverifiable:
+        pass
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    # Fallback: ask the Supabase auth server
     try:
-        token = credentials.credentials
-        user_res = supabase.auth.get_user(token)
-        return user_res.user
+        with stage("auth", "supabase_fallback"):
+            user_res = await run_in_threadpool(supabase.auth.get_user, token)
+        user = AuthUser(id=user_res.user.id, email=user_res.user.email)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    token_verifier.remember(token, user, unverified_expiry(token))
+    return user
+
+def require_service_key(x_service_key: Optional[str] = Header(None)):
+    """Guards internal endpoints with the shared SERVICE_API_KEY."""
+    if not settings.service_api_key:
+        raise HTTPException(status_code=403, detail="Service endpoints are disabled")
+    if not x_service_key or not hmac.compare_digest(x_service_key.encode(), settings.service_api_key.encode()):
+        raise HTTPException(status_code=403, detail="Invalid service key")
+
+def evict_user_caches(user_id):
+    recommendation_cache.pop(user_id)
+    profile_cache.pop(user_id)
+
+async def fill_sentiment(review_id, review_text):
+    """Background task: scores a review saved with sentiment pending (NULL) and stores the label."""
+    try:
+        with stage("sentiment", "score"):
+            sentiment = await sentiment_scorer.score(review_text)
+        # If the text was edited meanwhile, that edit scheduled its own fill; don't overwrite it.
+        query = text(
+            "UPDATE reviews SET sentiment = :sentiment "
+            "WHERE review_id = :review_id AND review_text = :review_text"
+        )
+        async with async_engine.connect() as connection:
+            await connection.execute(query, {"sentiment": sentiment, "review_id": review_id, "review_text": review_text})
+            await connection.commit()
+    except Exception:
+        HANDLED_ERRORS.inc(source="sentiment")
+        logger.exception("Sentiment scoring failed for review %s", review_id)
+
+async def watch_model_artifacts():
+    """Polls artifacts/CURRENT and hot-swaps the served model when it changes."""
+    while True:
+        await asyncio.sleep(settings.model_reload_interval)
+        try:
+            if await run_in_threadpool(model_store.reload_if_changed):
+                recommendation_cache.clear()
+                profile_cache.clear()
+        except Exception:
+            HANDLED_ERRORS.inc(source="model_reload")
+            logger.exception("Model reload failed")
 
 # --- API Endpoints ---
 @app.get("/")
@@ -72,64 +207,64 @@ def login_user(credentials: UserCredentials):
 
 # (Review creation endpoint remains the same)
 @app.post("/reviews", tags=["Reviews"])
-def create_review(review: ReviewCreate, current_user: dict = Depends(get_current_user)):
-    sentiment = "neutral"
-    if review.review_text:
-        sentiment_scores = sentiment_analyzer.polarity_scores(review.review_text)
-        if sentiment_scores['compound'] >= 0.05:
-            sentiment = "positive"
-        elif sentiment_scores['compound'] <= -0.05:
-            sentiment = "negative"
-    query = text("INSERT INTO reviews (user_id, movie_id, rating, review_text, sentiment) VALUES (:user_id, :movie_id, :rating, :review_text, :sentiment)")
+async def create_review(review: ReviewCreate, background_tasks: BackgroundTasks, current_user: dict = Depends(get_current_user)):
+    # Empty or already-seen texts are labelled inline; anything else is saved
+    # as pending (NULL) and scored after the response has been sent.
+    sentiment = sentiment_scorer.cached(review.review_text)
+    query = text("INSERT INTO reviews (user_id, movie_id, rating, review_text, sentiment) VALUES (:user_id, :movie_id, :rating, :review_text, :sentiment) RETURNING review_id")
     params = {"user_id": current_user.id, "movie_id": review.movie_id, "rating": review.rating, "review_text": review.review_text, "sentiment": sentiment}
     try:
-        with engine.connect() as connection:
-            connection.execute(query, params)
-            connection.commit()
-        return {"message": "Review created successfully", "sentiment": sentiment}
+        with stage("create_review", "insert"):
+            async with async_engine.connect() as connection:
+                review_id = (await connection.execute(query, params)).scalar_one()
+                await connection.commit()
+        evict_user_caches(current_user.id)
+        if sentiment is None:
+            background_tasks.add_task(fill_sentiment, review_id, review.review_text)
+        return {"message": "Review created successfully", "review_id": review_id, "sentiment": sentiment}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating review: {e}")
 
 # --- NEW ENDPOINTS ---
 
 @app.get("/reviews/me", tags=["Reviews"])
-def get_my_reviews(current_user: dict = Depends(get_current_user)):
-    """Fetches all reviews for the currently logged-in user."""
+async def get_my_reviews(request: Request, current_user: dict = Depends(get_current_user)):
+    """Fetches all reviews for the currently logged-in user.
+
+    Always read fresh: a write may have gone to another worker, and the user
+    must see it. The ETag still spares the body when nothing changed."""
     query = text(
         "SELECT r.review_id, r.rating, r.review_text, r.sentiment, r.created_at, m.title "
         "FROM reviews r JOIN movies m ON r.movie_id = m.movie_id "
         "WHERE r.user_id = :user_id ORDER BY r.created_at DESC"
     )
-    with engine.connect() as connection:
-        result = connection.execute(query, {"user_id": current_user.id})
-        reviews = result.fetchall()
-        return [dict(row._mapping) for row in reviews]
+    with stage("my_reviews", "query"):
+        async with async_engine.connect() as connection:
+            result = await connection.execute(query, {"user_id": current_user.id})
+            reviews = result.fetchall()
+    entry = CachedResponse.of([dict(row._mapping) for row in reviews])
+    return entry.respond(request, cache_control="private, no-cache")
 
 @app.put("/reviews/{review_id}", tags=["Reviews"])
-def update_review(review_id: int, review_update: ReviewUpdate, current_user: dict = Depends(get_current_user)):
+async def update_review(review_id: int, review_update: ReviewUpdate, background_tasks: BackgroundTasks, current_user: dict = Depends(get_current_user)):
     """Updates a user's own review."""
-    with engine.connect() as connection:
+    async with async_engine.connect() as connection:
         # Security Check: First, verify the review belongs to the current user
         owner_check_query = text("SELECT user_id FROM reviews WHERE review_id = :review_id")
-        owner_result = connection.execute(owner_check_query, {"review_id": review_id}).fetchone()
+        with stage("update_review", "owner_check"):
+            owner_result = (await connection.execute(owner_check_query, {"review_id": review_id})).fetchone()
         
         if not owner_result:
             raise HTTPException(status_code=404, detail="Review not found")
         if str(owner_result[0]) != str(current_user.id):
             raise HTTPException(status_code=403, detail="Not authorized to update this review")
 
-        # If check passes, proceed with update
-        sentiment = "neutral"
-        if review_update.review_text:
-            sentiment_scores = sentiment_analyzer.polarity_scores(review_update.review_text)
-            if sentiment_scores['compound'] >= 0.05:
-                sentiment = "positive"
-            elif sentiment_scores['compound'] <= -0.05:
-                sentiment = "negative"
+        # If check passes, proceed with update (sentiment as in create_review)
+        sentiment = sentiment_scorer.cached(review_update.review_text)
 
         update_query = text(
-            "UPDATE reviews SET rating = :rating, review_text = :review_text, sentiment = :sentiment "
-            "WHERE review_id = :review_id"
+            "UPDATE reviews SET rating = :rating, review_text = :review_text, sentiment = :sentiment, "
+            "updated_at = CURRENT_TIMESTAMP WHERE review_id = :review_id"
         )
         params = {
             "rating": review_update.rating,
@@ -137,68 +272,246 @@ def update_review(review_id: int, review_update: ReviewUpdate, current_user: dic
             "sentiment": sentiment,
             "review_id": review_id
         }
-        connection.execute(update_query, params)
-        connection.commit()
-        return {"message": "Review updated successfully"}
+        with stage("update_review", "update"):
+            await connection.execute(update_query, params)
+            await connection.commit()
+        evict_user_caches(current_user.id)
+        if sentiment is None:
+            background_tasks.add_task(fill_sentiment, review_id, review_update.review_text)
+        return {"message": "Review updated successfully", "sentiment": sentiment}
 
 
 # (Existing movie endpoints remain the same)
 # ... /recommendations, /movies, /movies/{movie_id}/similar endpoints go here ...
+async def fetch_user_ratings(model, user_id):
+    """A user's reviews as (catalogue positions, ratings), read on the async engine."""
+    query = text("SELECT movie_id, rating FROM reviews WHERE user_id = :user_id")
+    async with async_engine.connect() as connection:
+        rows = (await connection.execute(query, {"user_id": str(user_id)})).fetchall()
+    return model.ratings_of([row[0] for row in rows], [row[1] for row in rows])
+
+def fetch_batch_reviews(user_ids):
+    """Reviews of a block of batch users the model doesn't know; None if the database fails."""
+    try:
+        with engine.connect() as connection:
+            return fetch_user_reviews(connection, [str(user_id) for user_id in user_ids])
+    except SQLAlchemyError:
+        HANDLED_ERRORS.inc(source="review_lookup")
+        logger.exception("Fetching reviews for %d batch users failed", len(user_ids))
+        return None
+
+def rank_known_user(model, user_id):
+    user_profile = profile_cache.get(user_id)
+    if user_profile is None:
+        with stage("recommendations", "profile"):
+            user_profile = model.ranker.profiles([user_id])
+        profile_cache.set(user_id, user_profile)
+    with stage("recommendations", "rank"):
+        return model.ranker.rank([user_id], n=10, profiles=user_profile)[0]
+
 @app.get("/recommendations", tags=["Recommendations"])
-def get_recommendations(current_user: dict = Depends(get_current_user)):
-    user_id_sim = 196
-    unrated_movie_ids = movies_df[~movies_df['movie_id'].isin(ratings_df[ratings_df['user_id'] == user_id_sim]['item_id'])]['movie_id']
-    predictions = [svd.predict(user_id_sim, movie_id) for movie_id in unrated_movie_ids]
-    predictions.sort(key=lambda x: x.est, reverse=True)
-    top_svd_candidates = predictions[:50]
-    user_high_ratings = ratings_df[(ratings_df['user_id'] == user_id_sim) & (ratings_df['rating'] >= 4)]
-    if user_high_ratings.empty:
-        top_n_movie_ids = [pred.iid for pred in top_svd_candidates[:10]]
+async def get_recommendations(current_user: dict = Depends(get_current_user)):
+    with stage("recommendations", "cache"):
+        cached = recommendation_cache.get(current_user.id)
+    if cached is not None:
+        return {"recommendations": cached}
+    model = model_store.current
+    cacheable = True
+    # Ranking is CPU-bound NumPy work, so it runs in the threadpool, off the event loop.
+    if model.knows(current_user.id):
+        top_positions = await run_in_threadpool(rank_known_user, model, current_user.id)
     else:
-        user_profile_indices = [indices[mid] for mid in user_high_ratings['item_id']]
-        user_profile_matrix = tfidf_matrix[user_profile_indices].mean(axis=0)
-        user_profile = np.asarray(user_profile_matrix)
-        candidate_scores = {}
-        for pred in top_svd_candidates:
-            candidate_index = indices[pred.iid]
-            content_sim = linear_kernel(user_profile, tfidf_matrix[candidate_index]).flatten()[0]
-            hybrid_score = pred.est * 0.5 + content_sim * 0.5
-            candidate_scores[pred.iid] = hybrid_score
-        reranked_candidates = sorted(candidate_scores.items(), key=lambda item: item[1], reverse=True)
-        top_n_movie_ids = [mid for mid, score in reranked_candidates[:10]]
-    recommended_titles = movies_df[movies_df['movie_id'].isin(top_n_movie_ids)]['title'].tolist()
+        # Not in the bundle yet (the updater hasn't folded their reviews in): go by their reviews.
+        with stage("recommendations", "ratings"):
+            try:
+                positions, ratings = await fetch_user_ratings(model, current_user.id)
+            except SQLAlchemyError:
+                # Without their reviews they still get the overall ranking, just not cached.
+                HANDLED_ERRORS.inc(source="review_lookup")
+                logger.exception("Fetching reviews for %s failed", current_user.id)
+                positions, ratings = NO_RATINGS
+                cacheable = False
+        with stage("recommendations", "cold_start"):
+            top_positions = await run_in_threadpool(model.cold_start.recommend, positions, ratings, 10)
+    with stage("recommendations", "titles"):
+        recommended_titles = movies_df['title'].to_numpy()[top_positions].tolist()
+    if cacheable:
+        recommendation_cache.set(current_user.id, recommended_titles)
     return {"recommendations": recommended_titles}
 
+@app.post("/recommendations/batch", tags=["Recommendations"], dependencies=[Depends(require_service_key)])
+def get_batch_recommendations(request: BatchRecommendationRequest):
+    """Top-N lists for many users, scored in blocks and streamed back as NDJSON.
+    Users not in the model get the same cold-start lists as on /recommendations.
+    For internal email/notification jobs only: requires the X-Service-Key header."""
+    titles = movies_df['title'].to_numpy()
+    model = model_store.current
+
+    def stream():
+        for user_id, positions in model.rank_batch(request.user_ids, n=request.n, fetch_reviews=fetch_batch_reviews):
+            yield json.dumps({"user_id": user_id, "recommendations": titles[positions].tolist()}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/cache/stats", tags=["Admin"])
+def get_cache_stats():
+    """Hit/miss counters for the in-process caches, for sizing them."""
+    return {
+        "recommendations": recommendation_cache.stats(),
+        "profiles": profile_cache.stats(),
+        "responses": response_cache.stats(),
+    }
+
+CACHE_ENTRIES = Gauge("cache_entries", "Entries currently held by an in-process cache.", ("cache",))
+CACHE_HITS = CounterValue("cache_hits_total", "Lookups answered by an in-process cache.", ("cache",))
+CACHE_MISSES = CounterValue("cache_misses_total", "Lookups an in-process cache could not answer.", ("cache",))
+MODEL_INFO = Gauge("model_bundle_info", "Artifact bundle currently served (always 1).", ("version",))
+MODEL_CREATED = Gauge("model_bundle_created_timestamp_seconds", "When the served bundle was built.")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out_connections", "Connections currently checked out of the pool.", ("engine",))
+
+@app.get("/metrics", tags=["Admin"], response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of request, stage, DB and cache metrics."""
+    caches = {
+        "recommendations": recommendation_cache,
+        "profiles": profile_cache,
+        "responses": response_cache,
+        "tokens": token_verifier.validated,
+    }
+    for name, cache in caches.items():
+        CACHE_ENTRIES.set(len(cache), cache=name)
+        CACHE_HITS.set(cache.hits, cache=name)
+        CACHE_MISSES.set(cache.misses, cache=name)
+    bundle = model_store.current.bundle
+    MODEL_INFO.clear()
+    MODEL_INFO.set(1, version=bundle.version)
+    MODEL_CREATED.set(bundle.metadata.get("created_at", 0))
+    for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+        if hasattr(pool, "checkedout"):
+            DB_POOL_CHECKED_OUT.set(pool.checkedout(), engine=name)
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/movies/", tags=["Movies"])
-def search_movies(title: Optional[str] = None, genre: Optional[str] = None):
-    with engine.connect() as connection:
-        query = "SELECT movie_id, title, genres FROM movies"
-        conditions = []
-        params = {}
+async def search_movies(
+    request: Request,
+    title: Optional[str] = None,
+    genre: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    """Ranked title/genre search, one page at a time.
+
+    Pages are keyed on (rank, movie_id) rather than OFFSET; pass the
+    X-Next-Cursor header of a page back as `cursor` to get the next one.
+    """
+    cache_key = ("search", title, genre, limit, cursor)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached.respond(request)
+    conditions = []
+    params = {"limit": limit + 1}
+    if genre:
+        genre = GENRE_LOOKUP.get(genre.lower())
+        if genre is None:
+            raise HTTPException(status_code=400, detail="Unknown genre")
+        params["genre"] = genre
+    if is_postgres:
+        # Served by the trigram/tsvector/genre indexes from migrations/001_movie_search.sql
+        rank = "0::real"
         if title:
-            conditions.append("title ILIKE :title")
-            params["title"] = f"%{title}%"
+            rank = "(word_similarity(:title, title) + ts_rank(search_vector, plainto_tsquery('english', :title)))"
+            conditions.append(
+                "(title ILIKE :pattern OR :title <% title OR search_vector @@ plainto_tsquery('english', :title))"
+            )
+            params.update(title=title, pattern=f"%{title}%")
         if genre:
-            conditions.append("genres ILIKE :genre")
-            params["genre"] = f"%{genre}%"
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        result = connection.execute(text(query), params)
-        movies = result.fetchall()
-        return [{"movie_id": m[0], "title": m[1], "genres": m[2]} for m in movies]
+            conditions.append(
+                "EXISTS (SELECT 1 FROM movie_genres mg JOIN genres g ON g.genre_id = mg.genre_id "
+                "WHERE mg.movie_id = movies.movie_id AND g.name = :genre)"
+            )
+    else:
+        # SQLite (local stand-in) has no search indexes; its LIKE is already case-insensitive
+        rank = "0.0"
+        if title:
+            conditions.append("title LIKE :pattern")
+            params["pattern"] = f"%{title}%"
+        if genre:
+            conditions.append("genres LIKE :genre_pattern")
+            params["genre_pattern"] = f"%{genre}%"
+    query = f"SELECT movie_id, title, genres, {rank} AS rank FROM movies"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query = f"SELECT movie_id, title, genres, rank FROM ({query}) AS ranked"
+    if cursor:
+        try:
+            params["after_rank"], params["after_id"] = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query += " WHERE rank < :after_rank OR (rank = :after_rank AND movie_id > :after_id)"
+    query += " ORDER BY rank DESC, movie_id LIMIT :limit"
+
+    with stage("search", "query"):
+        async with async_engine.connect() as connection:
+            result = await connection.execute(text(query), params)
+            movies = result.fetchall()
+    headers = {}
+    if len(movies) > limit:
+        movies = movies[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(movies[-1][3], movies[-1][0])
+    entry = response_cache.store(cache_key, [{"movie_id": m[0], "title": m[1], "genres": m[2]} for m in movies], headers)
+    return entry.respond(request)
+
+@app.get("/movies/typeahead", tags=["Movies"])
+def typeahead_movies(q: str, limit: int = Query(10, ge=1, le=50)):
+    """Title suggestions from the in-memory index; never touches the database."""
+    positions = title_index.suggest(q, limit)
+    rows = movies_df.iloc[positions]
+    return [{"movie_id": int(movie_id), "title": title} for movie_id, title in zip(rows['movie_id'], rows['title'])]
 
 @app.get("/movies/{movie_id}/similar", tags=["Movies"])
-def get_similar_movies(movie_id: int):
+def get_similar_movies(
+    request: Request,
+    movie_id: int,
+    n: int = Query(10, ge=1, le=100),
+    genre: Optional[str] = None,
+    mode: str = Query("content", pattern="^(content|collaborative)$"),
+    exact: bool = False,
+    nprobe: Optional[int] = Query(None, ge=1),
+):
+    """Content mode reads the precomputed genre neighbours, so it returns at most
+    as many as were precomputed per movie (50 by default); collaborative mode
+    searches the SVD item factors, approximately (IVF, `nprobe` lists) unless `exact`."""
+    model = model_store.current
+    cache_key = ("similar", model.version, movie_id, n, genre, mode, exact, nprobe)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached.respond(request)
     try:
         idx = indices[movie_id]
-        sim_scores = list(enumerate(linear_kernel(tfidf_matrix[idx], tfidf_matrix).flatten()))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-        sim_scores = sim_scores[1:11]
-        movie_indices = [i[0] for i in sim_scores]
-        similar_movies = movies_df['title'].iloc[movie_indices].tolist()
-        return {"similar_movies": similar_movies}
     except KeyError:
         raise HTTPException(status_code=404, detail="Movie not found")
+    allowed = None
+    if genre:
+        genre_col = GENRE_LOOKUP.get(genre.lower())
+        if genre_col is None:
+            raise HTTPException(status_code=400, detail=f"Unknown genre: {genre}")
+        allowed = movies_df[genre_col].to_numpy() == 1
+    if mode == "collaborative":
+        if not model.factor_index.contains(idx):
+            raise HTTPException(status_code=404, detail="No rating data for this movie yet")
+        if nprobe is None and len(model.factor_index.items) > settings.ann_exact_max_items:
+            nprobe = settings.ann_nprobe
+        if exact:
+            nprobe = None
+        with stage("similar", "ann_factors" if nprobe else "exact_factors"):
+            movie_indices, _ = model.factor_index.neighbours(idx, n=n, nprobe=nprobe, allowed=allowed)
+    else:
+        similarity_index = model.similarity_index
+        with stage("similar", "neighbours"):
+            movie_indices, _ = similarity_index.neighbours(idx, n=min(n, similarity_index.width), allowed=allowed)
+    with stage("similar", "titles"):
+        similar_movies = movies_df['title'].iloc[movie_indices].tolist()
+    return response_cache.store(cache_key, {"similar_movies": similar_movies}).respond(request)
     
     # Add this endpoint to src/main.py
 @app.get("/users/me", tags=["Users"])
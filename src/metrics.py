@@ -0,0 +1,174 @@
+# src/metrics.py
+# In-process metrics rendered in the Prometheus text exposition format.
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, one series per label combination."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bucket] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f'{self.name}_bucket{_format_labels(labels + [("le", le)])} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(labels)} {total}'
+            yield f'{self.name}_count{_format_labels(labels)} {cumulative}'
+
+
+class Gauge:
+    """A value set from outside, typically refreshed right before a scrape."""
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def set(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f'{self.name}{_format_labels(list(zip(self.labelnames, key)))} {value}'
+
+
+class CounterValue(Gauge):
+    """A monotonic count kept elsewhere (e.g. cache hits), mirrored in at scrape time."""
+
+    type = 'counter'
+
+
+class Counter(CounterValue):
+    """A monotonic count incremented in-process."""
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+# --- Metrics shared across modules ---
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Time from request received to response headers sent.',
+    ('method', 'route', 'status'),
+)
+STAGE_SECONDS = Histogram(
+    'handler_stage_duration_seconds', 'Time spent in each stage of a request handler.', ('handler', 'stage'),
+)
+HANDLED_ERRORS = Counter(
+    'handled_errors_total', 'Errors logged and recovered from instead of failing a request or task.', ('source',),
+)
+DB_QUERY_SECONDS = Histogram('db_query_duration_seconds', 'Time spent executing SQL statements.', ('engine',))
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    'db_pool_checkout_seconds', 'Time to get a pooled connection (waiting for a free one or opening one).', ('engine',),
+)
+
+
+def stage(handler, name):
+    """Times one stage of a handler: `with stage("recommendations", "rank"): ...`"""
+    return STAGE_SECONDS.time(handler=handler, stage=name)
+
+
+def instrument_engine(engine, name):
+    """Records statement time and pool checkout time for a (sync) Engine.
+
+    For an AsyncEngine pass its `.sync_engine`; the greenlet bridge makes the
+    timings include the awaited network round-trips.
+    """
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        DB_QUERY_SECONDS.observe(time.perf_counter() - conn.info['query_started'].pop(), engine=name)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        started = context.connection.info.get('query_started') if context.connection is not None else None
+        if started:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started.pop(), engine=name)
+
+    # The pool has no "checkout requested" event, so time the call itself.
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        with DB_POOL_CHECKOUT_SECONDS.time(engine=name):
+            return connect()
+
+    pool.connect = timed_connect
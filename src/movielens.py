@@ -0,0 +1,46 @@
+# src/movielens.py
+# Parsing of the raw MovieLens files, shared by training and the loaders.
+import pandas as pd
+
+GENRE_COLS = ['Action', 'Adventure', 'Animation', 'Childrens', 'Comedy', 'Crime', 'Documentary', 'Drama', 'Fantasy', 'Film-Noir', 'Horror', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western']
+ITEM_COLUMNS = ['movie_id', 'title', 'release_date', 'video_release_date', 'imdb_url', 'unknown'] + GENRE_COLS
+RATING_COLUMNS = ['user_id', 'item_id', 'rating', 'timestamp']
+
+
+def genre_strings(movies, sep='|'):
+    """Joins each row's set genre flags into one string, without a row-wise apply."""
+    flags = movies[GENRE_COLS] == 1
+    return flags.dot(pd.Index(GENRE_COLS) + sep).str[:-len(sep)].fillna('')
+
+
+def load_movies(path='data/u.item', sep='|'):
+    """Reads the catalogue with a `genres` column joined by `sep`.
+
+    Accepts the MovieLens-100k u.item format or a newer movies.csv
+    (movieId,title,genres), where the genre flag columns are derived from the
+    genres string instead.
+    """
+    if path.endswith('.csv'):
+        movies = pd.read_csv(path).rename(columns={'movieId': 'movie_id'})
+        genres = movies['genres'].replace('(no genres listed)', '')
+        # Newer releases spell one genre differently.
+        genres = genres.str.replace(r"Children(?:'s)?", 'Childrens', regex=True)
+        flags = genres.str.get_dummies(sep='|').reindex(columns=GENRE_COLS, fill_value=0)
+        movies = pd.concat([movies[['movie_id', 'title']], flags], axis=1)
+    else:
+        movies = pd.read_csv(path, sep='|', encoding='latin-1', header=None, names=ITEM_COLUMNS)
+    movies['title'] = movies['title'].str.replace(r'\s*\(\d{4}\)$', '', regex=True)
+    movies['genres'] = genre_strings(movies, sep)
+    return movies
+
+
+def load_ratings(path='data/u.data', chunksize=None):
+    """Reads ratings as user_id, item_id, rating, timestamp (u.data or ratings.csv).
+
+    With `chunksize` this returns an iterator of frames instead of one frame.
+    """
+    if path.endswith('.csv'):
+        reader = pd.read_csv(path, chunksize=chunksize, header=0, names=RATING_COLUMNS)
+    else:
+        reader = pd.read_csv(path, sep='\t', names=RATING_COLUMNS, chunksize=chunksize)
+    return reader
@@ -0,0 +1,57 @@
+# src/profiler.py
+import os
+import sys
+import threading
+from collections import Counter
+
+# Leaf frames of threads that are parked, not working (idle pool workers, the event loop's select).
+IDLE_FRAMES = {('threading.py', 'wait'), ('selectors.py', 'select'), ('queue.py', 'get')}
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of all other threads every `interval` seconds.
+
+    Used as a context manager around a request; `folded()` returns the stacks
+    in the folded format read by flamegraph.pl and speedscope
+    ("outer;inner;leaf count" per line). Parked threads are skipped, but
+    other requests running concurrently will show up too.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+    def dump(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(self.folded())
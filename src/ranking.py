@@ -0,0 +1,95 @@
+# src/ranking.py
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+
+
+class HybridRanker:
+    """SVD candidate generation followed by a content-based re-rank.
+
+    For each user the best `candidate_pool` unrated items by SVD estimate are
+    re-scored as
+
+        svd_weight * (estimate rescaled from the rating scale to [0, 1])
+        + content_weight * cosine(user profile, item TF-IDF vector)
+
+    where the profile is the mean TF-IDF vector of the items the user rated
+    at least `min_rating`. Both terms live on [0, 1], so the weights mean what
+    they say. Users without a profile get content 0, i.e. plain SVD order.
+
+    Everything works on blocks of users, so the same component serves the
+    single-user endpoint, batch jobs and offline evaluation.
+    """
+
+    def __init__(self, scorer, user_items, tfidf_matrix, svd_weight=0.5, content_weight=0.5, candidate_pool=50, min_rating=4):
+        self.scorer = scorer
+        self.user_items = user_items
+        self.tfidf_matrix = tfidf_matrix
+        self.svd_weight = svd_weight
+        self.content_weight = content_weight
+        self.candidate_pool = candidate_pool
+        self.min_rating = min_rating
+
+    def profiles(self, user_ids):
+        """L2-normalised content profiles as a sparse (len(user_ids) x n_terms) matrix."""
+        n_items = self.tfidf_matrix.shape[0]
+        rows, cols = [], []
+        for row, user_id in enumerate(user_ids):
+            liked = self.user_items.liked(user_id, self.min_rating)
+            rows.append(np.full(len(liked), row, dtype=np.int64))
+            cols.append(liked)
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        liked = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(user_ids), n_items))
+        # Normalising the sum is the same as normalising the mean.
+        return normalize(liked @ self.tfidf_matrix, norm='l2')
+
+    def candidates(self, user_ids):
+        """Top `candidate_pool` unrated positions per user, best SVD estimate first."""
+        scores = self.scorer.score_many(user_ids)
+        for row, user_id in enumerate(user_ids):
+            rated, _ = self.user_items.rated(user_id)
+            scores[row, rated] = -np.inf
+
+        pool = min(self.candidate_pool, scores.shape[1])
+        candidates = np.argpartition(-scores, pool - 1, axis=1)[:, :pool]
+        estimates = np.take_along_axis(scores, candidates, axis=1)
+        by_estimate = np.argsort(-estimates, axis=1, kind="stable")
+        return np.take_along_axis(candidates, by_estimate, axis=1), np.take_along_axis(estimates, by_estimate, axis=1)
+
+    def content_similarity(self, profiles, candidates):
+        """Cosine of each candidate to its user's profile, as one sparse row-wise product."""
+        pair_users = np.repeat(np.arange(candidates.shape[0]), candidates.shape[1])
+        pairs = self.tfidf_matrix[candidates.ravel()].multiply(profiles[pair_users])
+        return np.asarray(pairs.sum(axis=1)).reshape(candidates.shape)
+
+    def blend(self, estimates, content_sims):
+        """Weighted score per candidate; masked (-inf) estimates stay -inf whatever the weights."""
+        low, high = self.scorer.rating_scale
+        masked = ~np.isfinite(estimates)
+        # Zeroed before weighting, since 0 * -inf would be NaN with svd_weight=0.
+        svd_scores = np.where(masked, 0.0, (estimates - low) / (high - low))
+        blended = self.svd_weight * svd_scores + self.content_weight * content_sims
+        blended[masked] = -np.inf
+        return blended
+
+    def rank(self, user_ids, n=10, profiles=None):
+        """Top-n catalogue positions for each user, best first.
+
+        `profiles` can be passed in when the caller has them cached.
+        """
+        if not len(user_ids):
+            return []
+        candidates, estimates = self.candidates(user_ids)
+        if profiles is None:
+            profiles = self.profiles(user_ids)
+        hybrid = self.blend(estimates, self.content_similarity(profiles, candidates))
+        order = np.argsort(-hybrid, axis=1, kind="stable")[:, :n]
+        top = np.take_along_axis(candidates, order, axis=1)
+        valid = np.isfinite(np.take_along_axis(hybrid, order, axis=1))
+        return [top[row][valid[row]] for row in range(len(user_ids))]
+
+    def rank_batch(self, user_ids, n=10, block_size=512):
+        """Yields (user_id, positions) for every user, ranking them block by block."""
+        for start in range(0, len(user_ids), block_size):
+            block = user_ids[start:start + block_size]
+            yield from zip(block, self.rank(block, n))
@@ -0,0 +1,45 @@
+# src/response_cache.py
+import hashlib
+
+import orjson
+from fastapi import Request, Response
+
+from .cache import LRUCache
+
+
+class CachedResponse:
+    """A serialized JSON payload with its strong ETag, ready to be sent as-is."""
+
+    __slots__ = ('body', 'etag', 'headers')
+
+    def __init__(self, body, headers=None):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.headers = headers or {}
+
+    @classmethod
+    def of(cls, payload, headers=None):
+        return cls(orjson.dumps(payload), headers)
+
+    def matches(self, if_none_match):
+        if not if_none_match:
+            return False
+        # If-None-Match uses the weak comparison, so a W/ prefix still matches.
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or self.etag in tags
+
+    def respond(self, request: Request, cache_control='no-cache'):
+        headers = {**self.headers, 'ETag': self.etag, 'Cache-Control': cache_control}
+        if self.matches(request.headers.get('if-none-match')):
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type='application/json', headers=headers)
+
+
+class ResponseCache(LRUCache):
+    """LRU of CachedResponse entries. Callers put whatever invalidates an
+    entry (model version, user id) into its key."""
+
+    def store(self, key, payload, headers=None):
+        entry = CachedResponse.of(payload, headers)
+        self.set(key, entry)
+        return entry
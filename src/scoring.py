@@ -0,0 +1,98 @@
+# src/scoring.py
+import numpy as np
+
+
+class SVDScorer:
+    """Scores the whole catalogue for a user with a single matrix-vector product.
+
+    The factors are pulled out of a fitted surprise SVD (or an artifact
+    bundle) once and aligned to the catalogue order (the rows of movies_df /
+    tfidf_matrix), so a score at position i always belongs to movies_df.iloc[i].
+    Users are keyed by their raw id as a string.
+    """
+
+    def __init__(self, pu, bu, qi, bi, global_mean, user_index, item_known, rating_scale=(1, 5)):
+        self.pu = pu
+        self.bu = bu
+        self.qi = qi
+        self.bi = bi
+        self.global_mean = global_mean
+        self.user_index = user_index
+        self.item_known = item_known
+        self.rating_scale = rating_scale
+
+    @classmethod
+    def from_svd(cls, svd, movie_ids):
+        trainset = svd.trainset
+        n_factors = svd.qi.shape[1]
+
+        # Items the SVD never saw keep zero factors and bias, which is exactly
+        # what surprise does for an unknown item (global mean + user bias).
+        qi = np.zeros((len(movie_ids), n_factors), dtype=np.float64)
+        bi = np.zeros(len(movie_ids), dtype=np.float64)
+        item_known = np.zeros(len(movie_ids), dtype=bool)
+        for pos, movie_id in enumerate(movie_ids):
+            inner_id = trainset._raw2inner_id_items.get(movie_id)
+            if inner_id is not None:
+                qi[pos] = svd.qi[inner_id]
+                bi[pos] = svd.bi[inner_id]
+                item_known[pos] = True
+
+        return cls(
+            pu=np.asarray(svd.pu),
+            bu=np.asarray(svd.bu),
+            qi=qi,
+            bi=bi,
+            global_mean=trainset.global_mean,
+            user_index={str(raw_id): inner_id for raw_id, inner_id in trainset._raw2inner_id_users.items()},
+            item_known=item_known,
+            rating_scale=trainset.rating_scale,
+        )
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        return cls(
+            pu=bundle.pu,
+            bu=bundle.bu,
+            qi=bundle.qi,
+            bi=bundle.bi,
+            global_mean=bundle.metadata['global_mean'],
+            user_index={user_id: i for i, user_id in enumerate(bundle.user_ids.tolist())},
+            item_known=bundle.item_known,
+            rating_scale=tuple(bundle.metadata['rating_scale']),
+        )
+
+    def score(self, user_id):
+        """Returns the clipped rating estimate for every catalogue position."""
+        scores = self.global_mean + self.bi
+        inner_id = self.user_index.get(str(user_id))
+        if inner_id is not None:
+            scores = scores + self.bu[inner_id] + self.qi @ self.pu[inner_id]
+        return np.clip(scores, *self.rating_scale)
+
+    def score_many(self, user_ids):
+        """Scores a block of users at once: returns a (len(user_ids), n_items) matrix."""
+        rows = np.array([self.user_index.get(str(user_id), -1) for user_id in user_ids], dtype=np.int64)
+        known = rows >= 0
+        scores = np.empty((len(rows), len(self.bi)), dtype=np.float64)
+        scores[:] = self.global_mean + self.bi
+        if known.any():
+            inner = rows[known]
+            scores[known] += self.bu[inner][:, None] + self.pu[inner] @ self.qi.T
+        return np.clip(scores, *self.rating_scale, out=scores)
+
+
+def top_n(scores, n):
+    """Indices of the n best finite scores, best first, ties in index order.
+
+    Selects with argpartition and sorts only those n, so masked (-inf)
+    entries never come back even when fewer than n are left.
+    """
+    n = min(n, int(np.isfinite(scores).sum()))
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    if n < len(scores):
+        candidates = np.argpartition(-scores, n - 1)[:n]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
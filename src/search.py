@@ -0,0 +1,92 @@
+# src/search.py
+import base64
+import bisect
+import json
+import re
+import unicodedata
+
+import numpy as np
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text):
+    """Lowercases, strips accents and collapses punctuation to single spaces."""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return _NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """In-memory prefix + trigram index over catalogue titles, for typeahead.
+
+    Prefix lookups bisect a sorted list of (title, word) keys, so they cost
+    O(log n + matches). Typos and infix matches fall back to a trigram
+    inverted index scored by overlap.
+    """
+
+    def __init__(self, titles):
+        self.titles = list(titles)
+        normalized = [normalize(title) for title in self.titles]
+        self.lengths = np.array([len(title) for title in normalized])
+
+        # Every word suffix of a title is a key, so "star" finds "Star Wars"
+        # and "wars" finds it too. Whole-title keys rank above word keys.
+        keys = []
+        for position, title in enumerate(normalized):
+            words = title.split()
+            for start in range(len(words)):
+                keys.append((' '.join(words[start:]), start > 0, position))
+        keys.sort()
+        self.prefix_keys = [key for key, _, _ in keys]
+        self.prefix_entries = [(inner, position) for _, inner, position in keys]
+
+        postings = {}
+        for position, title in enumerate(normalized):
+            for gram in trigrams(title):
+                postings.setdefault(gram, []).append(position)
+        self.postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+        self.gram_counts = np.array([len(trigrams(title)) for title in normalized])
+
+    def prefix_matches(self, query):
+        start = bisect.bisect_left(self.prefix_keys, query)
+        stop = bisect.bisect_left(self.prefix_keys, query + '\x7f')
+        best = {}
+        for inner, position in self.prefix_entries[start:stop]:
+            best[position] = min(best.get(position, True), inner)
+        # Whole-title prefix first, then shorter titles
+        return sorted(best, key=lambda position: (best[position], self.lengths[position], position))
+
+    def trigram_matches(self, query, limit, min_score=0.3):
+        grams = [gram for gram in trigrams(query) if gram in self.postings]
+        if not grams:
+            return []
+        hits = np.bincount(np.concatenate([self.postings[gram] for gram in grams]), minlength=len(self.titles))
+        scores = hits / (len(trigrams(query)) + self.gram_counts - hits)
+        candidates = np.flatnonzero(scores >= min_score)
+        order = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return order[:limit].tolist()
+
+    def suggest(self, query, limit=10):
+        """Catalogue positions best matching a partially typed title."""
+        query = normalize(query)
+        if not query:
+            return []
+        results = self.prefix_matches(query)[:limit]
+        if len(results) < limit:
+            seen = set(results)
+            results += [p for p in self.trigram_matches(query, limit) if p not in seen][:limit - len(results)]
+        return results
+
+
+def encode_cursor(rank, movie_id):
+    return base64.urlsafe_b64encode(json.dumps([rank, movie_id]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    rank, movie_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return float(rank), int(movie_id)
@@ -0,0 +1,71 @@
+# src/sentiment.py
+import asyncio
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from .cache import LRUCache
+
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+_analyzer = None
+
+
+def label(compound):
+    """Maps a VADER compound score to the label stored in reviews.sentiment."""
+    if compound >= POSITIVE_THRESHOLD:
+        return "positive"
+    if compound <= NEGATIVE_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+
+def score_text(text):
+    """Sentiment label of one review text; empty or missing text is neutral."""
+    global _analyzer
+    if not text:
+        return "neutral"
+    # Created lazily so pool worker processes each build their own.
+    if _analyzer is None:
+        _analyzer = SentimentIntensityAnalyzer()
+    return label(_analyzer.polarity_scores(text)['compound'])
+
+
+def score_texts(texts):
+    return [score_text(text) for text in texts]
+
+
+def content_key(text):
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class SentimentScorer:
+    """Review sentiment off the request path, memoised on a hash of the text.
+
+    Identical texts (resubmits, edits that only change the rating) are
+    answered from the cache; everything else runs on a thread or process
+    pool so the event loop never runs VADER itself.
+    """
+
+    def __init__(self, cache_size=10000, workers=2, use_processes=False):
+        self.cache = LRUCache(cache_size)
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.executor = executor_cls(max_workers=workers)
+
+    def cached(self, text):
+        """The label if it's known without scoring, else None."""
+        if not text:
+            return "neutral"
+        return self.cache.get(content_key(text))
+
+    async def score(self, text):
+        sentiment = self.cached(text)
+        if sentiment is None:
+            sentiment = await asyncio.get_running_loop().run_in_executor(self.executor, score_text, text)
+            self.cache.set(content_key(text), sentiment)
+        return sentiment
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
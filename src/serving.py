@@ -0,0 +1,138 @@
+# src/serving.py
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .ann import IVFIndex
+from .artifacts import ARTIFACTS_DIR, current_bundle_path, load_bundle
+from .cold_start import ColdStartRecommender, PopularityRankings
+from .metrics import HANDLED_ERRORS
+from .ranking import HybridRanker
+from .scoring import SVDScorer
+from .similarity import SimilarityIndex
+from .user_index import UserItemIndex
+
+NO_RATINGS = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+
+logger = logging.getLogger(__name__)
+
+
+class ServedModel:
+    """Everything the request path needs from one artifact bundle.
+
+    Handlers grab `model_store.current` once per request, so a hot swap never
+    mixes arrays from two bundle versions within a request.
+    """
+
+    def __init__(self, bundle, svd_weight=0.5, content_weight=0.5, candidate_pool=50,
+                 cold_start_ranking='top_rated', cold_start_min_ratings=5, cold_start_reg=0.1):
+        self.bundle = bundle
+        self.version = bundle.version
+        self.tfidf_matrix = bundle.tfidf_matrix
+        self.scorer = SVDScorer.from_bundle(bundle)
+        self.user_items = UserItemIndex.from_bundle(bundle)
+        self.similarity_index = SimilarityIndex.from_bundle(bundle)
+        self.factor_index = IVFIndex.from_bundle(bundle)
+        self.ranker = HybridRanker(
+            self.scorer, self.user_items, self.tfidf_matrix,
+            svd_weight=svd_weight, content_weight=content_weight, candidate_pool=candidate_pool,
+        )
+        self.cold_start = ColdStartRecommender(
+            self.scorer, PopularityRankings.from_bundle(bundle),
+            ranking=cold_start_ranking, min_ratings=cold_start_min_ratings, reg=cold_start_reg,
+        )
+        self.movie_positions = pd.Index(bundle.movie_ids)
+
+    def knows(self, user_id):
+        return str(user_id) in self.scorer.user_index
+
+    def ratings_of(self, movie_ids, ratings):
+        """(catalogue positions, ratings) for one user's reviews; movies outside the catalogue are dropped."""
+        if not len(movie_ids):
+            return NO_RATINGS
+        positions = self.movie_positions.get_indexer(movie_ids)
+        keep = positions >= 0
+        return positions[keep].astype(np.int64), np.asarray(ratings, dtype=np.float64)[keep]
+
+    def user_ratings(self, reviews):
+        """{user_id: (catalogue positions, ratings)} from a user_id/movie_id/rating frame."""
+        return {
+            user_id: self.ratings_of(group['movie_id'].to_numpy(), group['rating'].to_numpy())
+            for user_id, group in reviews.groupby(reviews['user_id'].astype(str), sort=False)
+        }
+
+    def rank_batch(self, user_ids, n=10, fetch_reviews=None, block_size=512):
+        """Yields (user_id, positions) for every user, in order.
+
+        Users in the bundle are ranked by the hybrid ranker a block at a time,
+        the rest by cold start, as /recommendations does: `fetch_reviews` is
+        called with a block's unknown users and returns their reviews as a
+        user_id/movie_id/rating frame, or None if it has nothing for them, in
+        which case they get the overall ranking.
+        """
+        for start in range(0, len(user_ids), block_size):
+            block = user_ids[start:start + block_size]
+            known = [user_id for user_id in block if self.knows(user_id)]
+            unknown = [user_id for user_id in block if not self.knows(user_id)]
+            ranked = dict(zip(map(str, known), self.ranker.rank(known, n)))
+            reviews = fetch_reviews(unknown) if unknown and fetch_reviews else None
+            ratings = self.user_ratings(reviews) if reviews is not None else {}
+            for user_id in block:
+                key = str(user_id)
+                if key in ranked:
+                    yield user_id, ranked[key]
+                else:
+                    yield user_id, self.cold_start.recommend(*ratings.get(key, NO_RATINGS), n=n)
+
+
+class CatalogueMismatch(Exception):
+    """Raised when a bundle was trained on a different catalogue than the one being served."""
+
+
+class ModelStore:
+    """Holds the served model and swaps it when artifacts/CURRENT moves on.
+
+    Titles, search and id lookups come from the catalogue loaded at startup,
+    so when `movie_ids` is given, bundles indexed over any other catalogue
+    are refused rather than served against the wrong titles.
+    """
+
+    def __init__(self, root=ARTIFACTS_DIR, movie_ids=None, **model_options):
+        self.root = root
+        self.movie_ids = None if movie_ids is None else np.asarray(movie_ids)
+        self.model_options = model_options
+        self._lock = threading.Lock()
+        self._rejected_path = None
+        bundle = load_bundle(current_bundle_path(root))
+        self.check_catalogue(bundle)
+        self.current = ServedModel(bundle, **model_options)
+
+    def check_catalogue(self, bundle):
+        if self.movie_ids is not None and not np.array_equal(bundle.movie_ids, self.movie_ids):
+            raise CatalogueMismatch(
+                f"Bundle {bundle.version} covers {len(bundle.movie_ids)} movies that don't match "
+                f"the served catalogue of {len(self.movie_ids)}; restart with its catalogue to serve it"
+            )
+
+    def reload_if_changed(self):
+        """Loads the CURRENT bundle if it differs from the served one. Returns True on a swap."""
+        path = current_bundle_path(self.root)
+        if path == self.current.bundle.path:
+            return False
+        with self._lock:
+            if path == self.current.bundle.path or path == self._rejected_path:
+                return False
+            bundle = load_bundle(path)
+            try:
+                self.check_catalogue(bundle)
+            except CatalogueMismatch:
+                # Logged once per bundle; keep serving the current one.
+                self._rejected_path = path
+                HANDLED_ERRORS.inc(source="catalogue_mismatch")
+                logger.error("Not swapping in %s", path, exc_info=True)
+                return False
+            # Build fully before swapping; the assignment itself is atomic.
+            self.current = ServedModel(bundle, **self.model_options)
+        return True
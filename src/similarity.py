@@ -0,0 +1,78 @@
+# src/similarity.py
+import numpy as np
+from sklearn.metrics.pairwise import linear_kernel
+
+from .scoring import top_n
+
+
+def build_neighbour_table(tfidf_matrix, n_neighbours=50, block_size=1024):
+    """Precomputes the top-N content neighbours of every movie.
+
+    Returns (items, scores): int32 catalogue positions and float32 cosine
+    scores, both shaped (n_movies, n_neighbours) and ordered best first.
+    The movie itself is never part of its own neighbour list.
+    """
+    n_movies = tfidf_matrix.shape[0]
+    n_neighbours = min(n_neighbours, n_movies - 1)
+    items = np.empty((n_movies, n_neighbours), dtype=np.int32)
+    scores = np.empty((n_movies, n_neighbours), dtype=np.float32)
+
+    # Work in row blocks so memory stays at block_size x n_movies.
+    for start in range(0, n_movies, block_size):
+        stop = min(start + block_size, n_movies)
+        block = linear_kernel(tfidf_matrix[start:stop], tfidf_matrix)
+        rows = np.arange(stop - start)
+        block[rows, rows + start] = -np.inf
+        top = np.argpartition(-block, n_neighbours - 1, axis=1)[:, :n_neighbours]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        # Stable sort on the partitioned columns so ties keep catalogue order.
+        order = np.lexsort((top, -top_scores), axis=1)
+        items[start:stop] = np.take_along_axis(top, order, axis=1)
+        scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+    return items, scores
+
+
+class SimilarityIndex:
+    """O(1) lookup of precomputed neighbours, usually memory-mapped from the artifact bundle.
+
+    With `tfidf_matrix` set, a filtered lookup that leaves fewer than n
+    neighbours in the precomputed row falls back to scanning the allowed items.
+    """
+
+    def __init__(self, items, scores, tfidf_matrix=None):
+        self.items = items
+        self.scores = scores
+        self.tfidf_matrix = tfidf_matrix
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        return cls(bundle.similar_items, bundle.similar_scores, bundle.tfidf_matrix)
+
+    @property
+    def width(self):
+        return self.items.shape[1]
+
+    def neighbours(self, position, n=10, allowed=None):
+        """Returns (positions, scores) of up to n neighbours of a catalogue position.
+
+        `allowed` is an optional boolean mask over the catalogue (e.g. a genre
+        column); neighbours outside it are skipped. Rare genres can filter out
+        most of the precomputed row, in which case the allowed items are
+        scored directly.
+        """
+        items = np.asarray(self.items[position])
+        scores = np.asarray(self.scores[position])
+        if allowed is not None:
+            keep = allowed[items]
+            items, scores = items[keep], scores[keep]
+            if len(items) < n and self.tfidf_matrix is not None:
+                return self.scan(position, n, allowed)
+        return items[:n], scores[:n]
+
+    def scan(self, position, n, allowed):
+        """Exact top-n over the allowed items, the movie itself excluded."""
+        candidates = np.flatnonzero(allowed)
+        candidates = candidates[candidates != position]
+        scores = linear_kernel(self.tfidf_matrix[candidates], self.tfidf_matrix[position]).ravel()
+        best = top_n(scores, n)
+        return candidates[best].astype(np.int32), scores[best].astype(np.float32)
@@ -0,0 +1,195 @@
+# src/updater.py
+# Folds new reviews into the served model without a full retrain.
+# Run from the repo root:
+#   python -m src.updater              # one pass
+#   python -m src.updater --watch 60   # poll every 60 seconds
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from .ann import IVFIndex
+from .artifacts import ARTIFACTS_DIR, current_bundle_path, load_bundle, new_version, prune_bundles, write_bundle
+from .user_index import UserItemIndex
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def fetch_new_reviews(connection, since):
+    """Reviews written or edited at or after `since`.
+
+    `>=` rather than `>`, so rows committed later with the watermark's own
+    timestamp aren't skipped; drop_seen() removes the ones already folded in.
+    """
+    query = text(
+        "SELECT review_id, user_id, movie_id, rating, updated_at FROM reviews "
+        "WHERE updated_at >= :since ORDER BY updated_at, review_id"
+    )
+    reviews = pd.read_sql(query, connection, params={"since": since})
+    return reviews.assign(updated_at=pd.to_datetime(reviews['updated_at']))
+
+
+def drop_seen(reviews, since, seen):
+    """Drops rows at exactly the watermark that the previous pass already folded in.
+
+    `seen` holds (review_id, rating) pairs, so an edit landing within the same
+    timestamp still gets through if it changed the rating.
+    """
+    if reviews.empty or not seen:
+        return reviews
+    at_watermark = reviews['updated_at'] == pd.Timestamp(since)
+    keys = list(zip(reviews['review_id'].astype(int), reviews['rating'].astype(int)))
+    already = np.array([key in seen for key in keys], dtype=bool)
+    return reviews[~(at_watermark.to_numpy() & already)]
+
+
+def watermark_of(reviews, since, seen):
+    """The next (watermark, seen pairs) after folding in `reviews`."""
+    latest = reviews['updated_at'].max()
+    at_latest = reviews[reviews['updated_at'] == latest]
+    pairs = set(zip(at_latest['review_id'].astype(int), at_latest['rating'].astype(int)))
+    if seen and latest == pd.Timestamp(since):
+        pairs |= seen
+    return latest.isoformat(), sorted([int(review_id), int(rating)] for review_id, rating in pairs)
+
+
+def fetch_user_reviews(connection, user_ids):
+    query = text(
+        "SELECT user_id, movie_id, rating FROM reviews WHERE user_id IN :user_ids"
+    ).bindparams(bindparam("user_ids", expanding=True))
+    return pd.read_sql(query, connection, params={"user_ids": list(user_ids)})
+
+
+def ridge_solve(features, targets, reg):
+    """Closed-form least squares with L2 regularisation: (A'A + reg*I)^-1 A'y."""
+    gram = features.T @ features + reg * np.eye(features.shape[1])
+    return np.linalg.solve(gram, features.T @ targets)
+
+
+def fold_in(bundle, user_reviews, reg=0.1, n_iters=2):
+    """Returns new bundle arrays with the reviewers' ratings folded in.
+
+    `user_reviews` holds *all* reviews of every affected user. Each affected
+    user gets a fresh (pu, bu) solved in closed form against the item factors,
+    merged with whatever ratings the bundle already had for them. Items that
+    were never part of training get (qi, bi) solved against those users, and
+    the two steps alternate `n_iters` times. Trained items are left untouched.
+    """
+    arrays = bundle.arrays()
+    global_mean = bundle.metadata['global_mean']
+    user_items = UserItemIndex.from_bundle(bundle)
+
+    user_reviews = user_reviews.assign(
+        user_id=user_reviews['user_id'].astype(str),
+        position=pd.Index(bundle.movie_ids).get_indexer(user_reviews['movie_id']),
+    )
+    user_reviews = user_reviews[user_reviews['position'] >= 0]
+
+    # Append rows for users the model has never seen.
+    user_ids = arrays['user_ids']
+    new_users = np.array(sorted(set(user_reviews['user_id']) - set(user_ids.tolist())), dtype=str)
+    n_factors = arrays['pu'].shape[1]
+    user_ids = np.concatenate([user_ids, new_users])
+    pu = np.vstack([arrays['pu'], np.zeros((len(new_users), n_factors), dtype=np.float32)])
+    bu = np.concatenate([arrays['bu'], np.zeros(len(new_users), dtype=np.float32)])
+    qi, bi = np.array(arrays['qi']), np.array(arrays['bi'])
+    item_known = np.array(arrays['item_known'])
+    row_of = {user_id: row for row, user_id in enumerate(user_ids.tolist())}
+
+    # Each affected user's full rating set: what the bundle had, overridden by their reviews.
+    old_users, old_items, old_values = user_items.triplets()
+    affected_rows = np.array(sorted({row_of[user_id] for user_id in user_reviews['user_id']}), dtype=np.int64)
+    reviews_users = user_reviews['user_id'].map(row_of).to_numpy()
+    n_items = len(item_known)
+    keep = ~np.isin(old_users * n_items + old_items, reviews_users * n_items + user_reviews['position'].to_numpy())
+    users = np.concatenate([old_users[keep], reviews_users])
+    items = np.concatenate([old_items[keep], user_reviews['position'].to_numpy()])
+    values = np.concatenate([old_values[keep], user_reviews['rating'].to_numpy()])
+    rated = UserItemIndex.from_triplets(user_ids, users, items, values)
+
+    new_items = np.array(sorted(set(user_reviews['position']) - set(np.flatnonzero(item_known).tolist())), dtype=np.int64)
+    touched = np.isin(users, affected_rows)
+    for _ in range(n_iters):
+        for row in affected_rows:
+            start, stop = rated.indptr[row], rated.indptr[row + 1]
+            positions, ratings = rated.items[start:stop], rated.values[start:stop]
+            features = np.hstack([qi[positions], np.ones((len(positions), 1))])
+            solution = ridge_solve(features, ratings - global_mean - bi[positions], reg)
+            pu[row], bu[row] = solution[:-1], solution[-1]
+        for position in new_items:
+            raters = users[touched & (items == position)]
+            ratings = values[touched & (items == position)]
+            features = np.hstack([pu[raters], np.ones((len(raters), 1))])
+            solution = ridge_solve(features, ratings - global_mean - bu[raters], reg)
+            qi[position], bi[position] = solution[:-1], solution[-1]
+    item_known[new_items] = True
+    # New items join the existing ANN lists; centroids only move on a full retrain.
+    factor_index = IVFIndex.from_bundle(bundle).with_items(new_items, qi[new_items])
+
+    arrays.update(
+        user_ids=user_ids, pu=pu, bu=bu, qi=qi, bi=bi, item_known=item_known,
+        rated_indptr=rated.indptr, rated_items=rated.items, rated_values=rated.values,
+        **factor_index.arrays(),
+    )
+    stats = {'users_folded': len(affected_rows), 'new_users': len(new_users), 'new_items': len(new_items)}
+    return arrays, stats
+
+
+def run_update(engine, root=ARTIFACTS_DIR, reg=0.1, n_iters=2):
+    """One incremental pass: read reviews past the watermark, fold them in, publish a new bundle."""
+    start = time.perf_counter()
+    bundle = load_bundle(current_bundle_path(root))
+    watermark = bundle.metadata.get('reviews_watermark')
+    since = datetime.fromisoformat(watermark) if watermark else EPOCH
+    seen = {tuple(pair) for pair in bundle.metadata.get('reviews_watermark_seen', [])}
+
+    with engine.connect() as connection:
+        new_reviews = drop_seen(fetch_new_reviews(connection, since), since, seen)
+        if new_reviews.empty:
+            return None
+        user_reviews = fetch_user_reviews(connection, new_reviews['user_id'].astype(str).unique())
+
+    arrays, stats = fold_in(bundle, user_reviews, reg=reg, n_iters=n_iters)
+    metadata = dict(bundle.metadata)
+    watermark, seen = watermark_of(new_reviews, since, seen)
+    metadata.update(
+        version=new_version(),
+        created_at=time.time(),
+        parent_version=bundle.version,
+        n_users=len(arrays['user_ids']),
+        reviews_watermark=watermark,
+        reviews_watermark_seen=seen,
+    )
+    path = write_bundle(arrays, metadata, root)
+    prune_bundles(root)
+    stats.update(new_reviews=len(new_reviews), version=metadata['version'], seconds=time.perf_counter() - start, path=path)
+    return stats
+
+
+def main():
+    from .database import engine
+
+    parser = argparse.ArgumentParser(description='Fold new reviews into the served model.')
+    parser.add_argument('--watch', type=float, default=0, help='poll interval in seconds (default: run once)')
+    parser.add_argument('--reg', type=float, default=0.1, help='L2 regularisation of the least-squares solves')
+    parser.add_argument('--iters', type=int, default=2, help='user/item alternations')
+    args = parser.parse_args()
+
+    while True:
+        stats = run_update(engine, reg=args.reg, n_iters=args.iters)
+        if stats:
+            print(f"Published {stats['version']}: {stats['new_reviews']} new reviews, "
+                  f"{stats['users_folded']} users ({stats['new_users']} new), "
+                  f"{stats['new_items']} new items in {stats['seconds']:.2f}s")
+        else:
+            print("No new reviews.")
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# src/user_index.py
+import numpy as np
+import pandas as pd
+
+
+class UserItemIndex:
+    """CSR-style user -> (catalogue positions, ratings) index.
+
+    Row u holds the items rated by user_ids[u], as positions into the
+    catalogue (rows of movies_df), sorted by position. A lookup is an array
+    slice, so it costs O(ratings of that user) however large the table is.
+    """
+
+    def __init__(self, user_ids, indptr, items, values):
+        self.user_ids = user_ids
+        self.indptr = indptr
+        self.items = items
+        self.values = values
+        self.user_index = {user_id: i for i, user_id in enumerate(user_ids.tolist())}
+
+    @classmethod
+    def from_ratings(cls, ratings, user_ids, movie_ids):
+        """Builds the index from a ratings frame with user_id, item_id and rating columns."""
+        user_ids = np.asarray(user_ids, dtype=str)
+        users = pd.Index(user_ids).get_indexer(ratings['user_id'].astype(str))
+        items = pd.Index(movie_ids).get_indexer(ratings['item_id'])
+        keep = (users >= 0) & (items >= 0)
+        return cls.from_triplets(user_ids, users[keep], items[keep], ratings['rating'].to_numpy()[keep])
+
+    @classmethod
+    def from_triplets(cls, user_ids, users, items, values):
+        """Builds the index from parallel (user row, catalogue position, rating) arrays."""
+        order = np.lexsort((items, users))
+        indptr = np.zeros(len(user_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(users, minlength=len(user_ids)), out=indptr[1:])
+        return cls(user_ids, indptr, np.asarray(items)[order].astype(np.int32), np.asarray(values)[order].astype(np.float32))
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        return cls(bundle.user_ids, bundle.rated_indptr, bundle.rated_items, bundle.rated_values)
+
+    def triplets(self):
+        """The inverse of from_triplets: (user rows, positions, ratings)."""
+        users = np.repeat(np.arange(len(self.user_ids)), np.diff(self.indptr))
+        return users, np.asarray(self.items), np.asarray(self.values)
+
+    def rated(self, user_id):
+        """Returns (positions, ratings) for a user; empty arrays for an unknown user."""
+        row = self.user_index.get(str(user_id))
+        if row is None:
+            return self.items[:0], self.values[:0]
+        start, stop = self.indptr[row], self.indptr[row + 1]
+        return self.items[start:stop], self.values[start:stop]
+
+    def liked(self, user_id, min_rating=4):
+        """Positions of the items a user rated at least `min_rating`."""
+        items, values = self.rated(user_id)
+        return items[values >= min_rating]
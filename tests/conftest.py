@@ -0,0 +1,110 @@
+# tests/conftest.py
+# The API runs against a throwaway SQLite database (through aiosqlite) and a
+# small artifact bundle trained into a temp directory, so the suite needs no
+# Postgres, Supabase or network access. Run from anywhere:
+#   python -m pytest -q
+import os
+import sqlite3
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP_DIR = tempfile.mkdtemp(prefix='movie-recommender-tests-')
+DB_PATH = os.path.join(TMP_DIR, 'test.db')
+
+# Must be in place before anything imports src.config / src.artifacts.
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{DB_PATH}",
+    SUPABASE_URL="http://127.0.0.1:9",
+    SUPABASE_KEY="test-key",
+    MODEL_RELOAD_INTERVAL="0",
+    ARTIFACTS_DIR=os.path.join(TMP_DIR, 'artifacts'),
+)
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+SCHEMA = """
+CREATE TABLE movies (movie_id INTEGER PRIMARY KEY, title TEXT, genres TEXT, poster_url TEXT);
+CREATE TABLE reviews (
+    review_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    movie_id INTEGER NOT NULL REFERENCES movies (movie_id),
+    rating INTEGER NOT NULL,
+    review_text TEXT,
+    sentiment TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def create_database(path, movies):
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    connection.executemany(
+        "INSERT INTO movies (movie_id, title, genres) VALUES (?, ?, ?)",
+        movies[['movie_id', 'title', 'genres']].values.tolist(),
+    )
+    connection.commit()
+    connection.close()
+
+
+@pytest.fixture(scope='session')
+def movies():
+    import joblib
+    return joblib.load('src/movies_df.joblib')
+
+
+@pytest.fixture(scope='session')
+def bundle_root(movies):
+    """A quick, low-rank bundle over the shipped catalogue and ratings."""
+    import joblib
+    from src.model import train_and_export
+
+    ratings = joblib.load('src/ratings_df.joblib')
+    params = {'n_factors': 10, 'n_epochs': 5, 'lr_all': 0.005, 'reg_all': 0.02}
+    train_and_export(ratings, movies, params, similar_top_n=20, save_joblibs=False)
+    return os.environ['ARTIFACTS_DIR']
+
+
+@pytest.fixture
+def database(tmp_path, movies):
+    """A fresh SQLite database with the app's schema, as a sync engine."""
+    from sqlalchemy import create_engine
+
+    path = tmp_path / 'reviews.db'
+    create_database(path, movies)
+    return create_engine(f"sqlite:///{path}")
+
+
+@pytest.fixture(scope='session')
+def api(bundle_root, movies):
+    create_database(DB_PATH, movies)
+    import src.main
+    return src.main
+
+
+@pytest.fixture(scope='session')
+def client(api):
+    from fastapi.testclient import TestClient
+
+    # Entered once, so every request runs on the same event loop as the async engine's pool.
+    with TestClient(api.app) as client:
+        yield client
+
+
+@pytest.fixture
+def login(api):
+    """Authenticates requests as a fresh user; call it again to switch users."""
+    from src.auth import AuthUser
+
+    def login_as(user_id=None):
+        user = AuthUser(id=user_id or str(uuid.uuid4()), email='test@example.com')
+        api.app.dependency_overrides[api.get_current_user] = lambda: user
+        return user
+
+    yield login_as
+    api.app.dependency_overrides.pop(api.get_current_user, None)
@@ -0,0 +1,188 @@
+# tests/test_auth.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+from src.auth import AuthUser, TokenUnverifiable, TokenVerifier
+
+SECRET = "test-jwt-secret-with-at-least-32-bytes"
+RSA_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+EC_KEY = ec.generate_private_key(ec.SECP256R1())
+
+
+def jwk(public_key, algorithm_cls, kid, alg):
+    return dict(algorithm_cls.to_jwk(public_key, as_dict=True), kid=kid, alg=alg, use="sig")
+
+
+JWKS = {"keys": [
+    jwk(RSA_KEY.public_key(), jwt.algorithms.RSAAlgorithm, "rsa-1", "RS256"),
+    jwk(EC_KEY.public_key(), jwt.algorithms.ECAlgorithm, "ec-1", "ES256"),
+]}
+
+
+def claims(**overrides):
+    now = int(time.time())
+    return dict({"sub": "user-1", "email": "a@example.com", "aud": "authenticated", "iat": now, "exp": now + 3600}, **overrides)
+
+
+@pytest.fixture(scope='module')
+def jwks_server():
+    """A local JWKS endpoint that counts how often it's fetched."""
+    fetches = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            fetches.append(self.path)
+            body = json.dumps(JWKS).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield SimpleNamespace(url=f"http://127.0.0.1:{server.server_port}/jwks.json", fetches=fetches)
+    server.shutdown()
+
+
+@pytest.fixture
+def verifier(jwks_server):
+    return TokenVerifier(jwks_server.url, jwt_secret=SECRET)
+
+
+def test_hs256_with_secret(verifier):
+    token = jwt.encode(claims(), SECRET, algorithm="HS256")
+    assert verifier.validate(token) == AuthUser(id="user-1", email="a@example.com")
+
+
+@pytest.mark.parametrize("key, kid, algorithm", [(RSA_KEY, "rsa-1", "RS256"), (EC_KEY, "ec-1", "ES256")])
+def test_asymmetric_against_jwks(verifier, key, kid, algorithm):
+    token = jwt.encode(claims(sub=f"user-{algorithm}"), key, algorithm=algorithm, headers={"kid": kid})
+    assert verifier.validate(token).id == f"user-{algorithm}"
+
+
+def test_jwks_is_fetched_once_and_cached(jwks_server, verifier):
+    fetched_before = len(jwks_server.fetches)
+    for sub in ("a", "b", "c"):
+        token = jwt.encode(claims(sub=sub), RSA_KEY, algorithm="RS256", headers={"kid": "rsa-1"})
+        verifier.validate(token)
+    assert len(jwks_server.fetches) - fetched_before == 1
+
+
+def test_expired_token_is_rejected(verifier):
+    token = jwt.encode(claims(exp=int(time.time()) - 60), SECRET, algorithm="HS256")
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.validate(token)
+
+
+def test_wrong_hs256_signature_is_rejected(verifier):
+    token = jwt.encode(claims(), "some-other-secret-that-is-32-bytes-long", algorithm="HS256")
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.validate(token)
+
+
+def test_wrong_rs256_signature_is_rejected(verifier):
+    impostor = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    token = jwt.encode(claims(), impostor, algorithm="RS256", headers={"kid": "rsa-1"})
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.validate(token)
+
+
+def test_alg_none_is_rejected(verifier):
+    token = jwt.encode(claims(), None, algorithm="none")
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        verifier.validate(token)
+
+
+def test_alg_must_match_the_kid_key(verifier):
+    # Signed with the EC key but pointing at the RSA key: must not reach decode with the wrong key type.
+    token = jwt.encode(claims(), EC_KEY, algorithm="ES256", headers={"kid": "rsa-1"})
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        verifier.validate(token)
+
+
+def test_key_of_the_wrong_type_is_an_invalid_key(verifier, monkeypatch):
+    monkeypatch.setattr(verifier, "signing_key", lambda token: (RSA_KEY.public_key(), "ES256"))
+    token = jwt.encode(claims(), EC_KEY, algorithm="ES256", headers={"kid": "ec-1"})
+    with pytest.raises(jwt.InvalidKeyError):
+        verifier.validate(token)
+
+
+def test_wrong_audience_is_rejected(verifier):
+    token = jwt.encode(claims(aud="anon"), SECRET, algorithm="HS256")
+    with pytest.raises(jwt.InvalidAudienceError):
+        verifier.validate(token)
+
+
+def test_validated_token_is_answered_from_cache(verifier):
+    token = jwt.encode(claims(), SECRET, algorithm="HS256")
+    user = verifier.verify(token)
+    # Rotating the secret would fail a fresh check; the cached entry still answers.
+    verifier.jwt_secret = "rotated-secret-that-is-also-32-bytes-long"
+    assert verifier.verify(token) == user
+    assert verifier.validated.hits == 1
+
+
+def test_cached_token_expires(verifier):
+    token = jwt.encode(claims(), SECRET, algorithm="HS256")
+    verifier.remember(token, AuthUser(id="user-1"), time.time() - 1)
+    assert verifier.cached(token) is None
+
+
+def test_hs256_without_secret_is_unverifiable(jwks_server):
+    token = jwt.encode(claims(), SECRET, algorithm="HS256")
+    with pytest.raises(TokenUnverifiable):
+        TokenVerifier(jwks_server.url).validate(token)
+
+
+# --- get_current_user ---
+
+def test_unverifiable_token_falls_back_to_supabase(api, client, monkeypatch):
+    calls = []
+
+    def get_user(token):
+        calls.append(token)
+        return SimpleNamespace(user=SimpleNamespace(id="supabase-user", email="s@example.com"))
+
+    # The app has no JWT secret configured, so HS256 tokens can't be checked locally.
+    monkeypatch.setattr(api.supabase.auth, "get_user", get_user)
+    token = jwt.encode(claims(sub="ignored"), SECRET, algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/users/me", headers=headers).json() == {"id": "supabase-user", "email": "s@example.com"}
+    assert client.get("/users/me", headers=headers).status_code == 200
+    assert calls == [token]
+
+
+def test_supabase_fallback_rejection_is_401(api, client, monkeypatch):
+    def get_user(token):
+        raise RuntimeError("invalid JWT")
+
+    monkeypatch.setattr(api.supabase.auth, "get_user", get_user)
+    token = jwt.encode(claims(sub="rejected"), SECRET, algorithm="HS256")
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+
+
+def test_mismatched_alg_and_kid_is_401(api, client, jwks_server, monkeypatch):
+    monkeypatch.setattr(api, "token_verifier", TokenVerifier(jwks_server.url))
+    token = jwt.encode(claims(), EC_KEY, algorithm="ES256", headers={"kid": "rsa-1"})
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+
+
+def test_invalid_token_never_reaches_supabase(api, client, monkeypatch):
+    def get_user(token):
+        raise AssertionError("should not be called")
+
+    monkeypatch.setattr(api.supabase.auth, "get_user", get_user)
+    token = jwt.encode(claims(), None, algorithm="none")
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
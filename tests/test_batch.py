@@ -0,0 +1,44 @@
+# tests/test_batch.py
+import json
+
+import pytest
+
+KEY = 'test-service-key'
+
+
+@pytest.fixture
+def service_key(api, monkeypatch):
+    monkeypatch.setattr(api.settings, 'service_api_key', KEY)
+    return {'X-Service-Key': KEY}
+
+
+def test_batch_streams_ndjson(api, client, service_key):
+    user_ids = api.model_store.current.bundle.user_ids[:3].tolist()
+    response = client.post('/recommendations/batch', json={'user_ids': user_ids, 'n': 5}, headers=service_key)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line['user_id'] for line in lines] == user_ids
+    assert all(len(line['recommendations']) == 5 for line in lines)
+
+
+@pytest.mark.parametrize('headers', [{}, {'X-Service-Key': 'wrong'}, {'X-Service-Key': 'é'.encode('latin-1')}])
+def test_batch_requires_service_key(client, service_key, headers):
+    response = client.post('/recommendations/batch', json={'user_ids': ['1'], 'n': 5}, headers=headers)
+    assert response.status_code == 403
+
+
+def test_batch_disabled_without_configured_key(client):
+    response = client.post('/recommendations/batch', json={'user_ids': ['1']}, headers={'X-Service-Key': ''})
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize('n', [-1, 0, 101])
+def test_batch_rejects_bad_n(client, service_key, n):
+    response = client.post('/recommendations/batch', json={'user_ids': ['1'], 'n': n}, headers=service_key)
+    assert response.status_code == 422
+
+
+def test_batch_caps_user_ids(api, client, service_key):
+    user_ids = ['1'] * (api.settings.batch_max_users + 1)
+    response = client.post('/recommendations/batch', json={'user_ids': user_ids}, headers=service_key)
+    assert response.status_code == 422
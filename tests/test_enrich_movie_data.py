@@ -0,0 +1,227 @@
+# tests/test_enrich_movie_data.py
+import asyncio
+import json
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import text
+
+from scripts import enrich_movie_data
+
+N_MOVIES = 40
+
+
+class MockOMDb:
+    """In-process stand-in for OMDb that records requests and injects failures.
+
+    `fail[title] = k` answers the first k requests for that title with a 503;
+    titles in `no_poster` get OMDb's "Movie not found!" answer; requests past
+    the first `stall_after` hang until `release` is set.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.api_keys = set()
+        self.fail = {}
+        self.no_poster = set()
+        self.stall_after = None
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                title = query['t'][0]
+                with mock._lock:
+                    mock.requests.append(title)
+                    mock.api_keys.update(query.get('apikey', []))
+                    failing = mock.fail.get(title, 0) > 0
+                    if failing:
+                        mock.fail[title] -= 1
+                    stalled = mock.stall_after is not None and len(mock.requests) > mock.stall_after
+                if stalled:
+                    mock.release.wait(10)
+                if failing:
+                    self.reply(503, {"Error": "Service Unavailable"})
+                elif title in mock.no_poster:
+                    self.reply(200, {"Response": "False", "Error": "Movie not found!"})
+                else:
+                    self.reply(200, {"Response": "True", "Title": title, "Poster": mock.poster(title)})
+
+            def reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+
+    @staticmethod
+    def poster(title):
+        return f"https://posters.example/{urllib.parse.quote(title)}.jpg"
+
+    def requests_for(self, title):
+        return self.requests.count(title)
+
+
+@pytest.fixture
+def omdb():
+    mock = MockOMDb()
+    threading.Thread(target=mock.server.serve_forever, daemon=True).start()
+    yield mock
+    mock.release.set()
+    mock.server.shutdown()
+
+
+@pytest.fixture
+def catalogue(database):
+    """The test database cut down to N_MOVIES movies, none with a poster yet."""
+    with database.begin() as connection:
+        connection.execute(text("DELETE FROM movies WHERE movie_id > :n"), {"n": N_MOVIES})
+    return database
+
+
+def titles(engine):
+    with engine.connect() as connection:
+        return dict(connection.execute(text("SELECT title, poster_url FROM movies")).fetchall())
+
+
+def argv(engine, omdb, tmp_path, *extra):
+    return [
+        '--database-url', str(engine.url), '--omdb-url', omdb.url, '--omdb-api-key', 'test-omdb-key',
+        '--checkpoint', str(tmp_path / 'checkpoint.json'),
+        '--rate', '1000', '--concurrency', '8', '--batch-size', '5', '--backoff', '0.001', *extra,
+    ]
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(enrich_movie_data.random, 'random', lambda: 0.5)
+    assert [enrich_movie_data.backoff_delay(attempt, base=0.5, cap=30) for attempt in range(8)] == [
+        0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 30.0, 30.0,
+    ]
+    monkeypatch.setattr(enrich_movie_data.random, 'random', lambda: 0.0)
+    assert enrich_movie_data.backoff_delay(2, base=0.5) == 1.0
+
+
+def test_backoff_sleeps_between_retries(omdb, monkeypatch):
+    delays = []
+    monkeypatch.setattr(enrich_movie_data, 'backoff_delay', lambda attempt, base: delays.append((attempt, base)) or 0)
+    omdb.fail['Toy Story'] = 3
+
+    async def fetch():
+        import httpx
+        async with httpx.AsyncClient() as client:
+            bucket = enrich_movie_data.TokenBucket(1000)
+            return await enrich_movie_data.get_poster_url(client, bucket, omdb.url, 'Toy Story', max_retries=4, backoff=0.25)
+
+    assert asyncio.run(fetch()) == omdb.poster('Toy Story')
+    assert delays == [(0, 0.25), (1, 0.25), (2, 0.25)]
+
+
+def test_full_run_retries_batches_and_reports_rate(catalogue, omdb, tmp_path, capsys):
+    omdb.fail.update({'Toy Story': 2, 'GoldenEye': 1})
+    omdb.no_poster.add('Four Rooms')
+    # More 503s than attempts: reported as failed, neither written nor checkpointed.
+    omdb.fail['Get Shorty'] = 100
+
+    enrich_movie_data.main(argv(catalogue, omdb, tmp_path))
+
+    assert omdb.requests_for('Toy Story') == 3
+    assert omdb.requests_for('GoldenEye') == 2
+    assert omdb.requests_for('Get Shorty') == 5
+    posters = titles(catalogue)
+    assert posters['Toy Story'] == omdb.poster('Toy Story')
+    assert posters['Four Rooms'] is None
+    assert posters['Get Shorty'] is None
+    assert sum(url is not None for url in posters.values()) == N_MOVIES - 2
+    assert json.loads((tmp_path / 'checkpoint.json').read_text()) == {"no_poster": [3]}
+
+    assert omdb.api_keys == {'test-omdb-key'}
+    summary = capsys.readouterr().out.strip().splitlines()[-1]
+    assert re.search(rf"{N_MOVIES - 2} posters, 1 not found, 1 failed in [\d.]+s \([\d.]+ titles/s\)", summary)
+
+
+def test_database_and_key_default_to_settings(monkeypatch):
+    from src.config import settings
+
+    monkeypatch.setattr(settings, 'omdb_api_key', 'key-from-env')
+    args = enrich_movie_data.parse_args([])
+    assert (args.database_url, args.omdb_api_key) == (settings.database_url, 'key-from-env')
+
+
+def test_missing_omdb_key_is_an_error(monkeypatch):
+    from src.config import settings
+
+    monkeypatch.setattr(settings, 'omdb_api_key', None)
+    with pytest.raises(SystemExit):
+        enrich_movie_data.parse_args(['--database-url', 'sqlite://'])
+
+
+def test_writes_go_out_as_batched_updates(catalogue, omdb, tmp_path):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "UPDATE movies" in statement:
+            statements.append((statement, parameters))
+
+    from sqlalchemy import event
+
+    engine = enrich_movie_data.create_engine(str(catalogue.url))
+    event.listen(engine, "before_cursor_execute", record)
+    args = enrich_movie_data.parse_args(argv(catalogue, omdb, tmp_path))
+    movies = enrich_movie_data.pd.read_sql("SELECT movie_id, title FROM movies", engine)
+    stats = asyncio.run(enrich_movie_data.enrich(movies, engine, args))
+
+    assert stats['found'] == N_MOVIES
+    assert all("AS (VALUES" in statement and "FROM v" in statement for statement, _ in statements)
+    # Batches of --batch-size rows, so 40 posters take about 8 statements, not 40.
+    assert len(statements) <= N_MOVIES // 5 + 8
+    assert sum(len(parameters) // 2 for _, parameters in statements) == N_MOVIES
+
+
+def test_interrupted_run_resumes_where_it_stopped(catalogue, omdb, tmp_path):
+    omdb.no_poster.update({'Four Rooms', 'Copycat'})
+    args = enrich_movie_data.parse_args(argv(catalogue, omdb, tmp_path, '--concurrency', '2'))
+    movies = enrich_movie_data.pd.read_sql("SELECT movie_id, title FROM movies ORDER BY movie_id", catalogue)
+
+    # After 20 requests the network "dies" and the run is killed mid-flight.
+    omdb.stall_after = 20
+
+    async def interrupted():
+        task = asyncio.create_task(enrich_movie_data.enrich(movies, catalogue, args))
+        while len(omdb.requests) <= 20:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(interrupted())
+    omdb.release.set()
+    omdb.stall_after = None
+
+    first_run = list(omdb.requests)
+    written = {title for title, url in titles(catalogue).items() if url}
+    checkpointed = set(json.loads((tmp_path / 'checkpoint.json').read_text())["no_poster"])
+    assert written and 3 in checkpointed
+    assert len(first_run) < N_MOVIES
+
+    enrich_movie_data.main(argv(catalogue, omdb, tmp_path))
+
+    second_run = omdb.requests[len(first_run):]
+    # Committed posters and checkpointed misses are never asked for again.
+    assert not written & set(second_run)
+    assert 'Four Rooms' not in second_run
+    posters = titles(catalogue)
+    assert sum(url is not None for url in posters.values()) == N_MOVIES - 2
@@ -0,0 +1,53 @@
+# tests/test_ranking.py
+import warnings
+
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from src.ranking import HybridRanker
+from src.scoring import SVDScorer, top_n
+from src.user_index import UserItemIndex
+
+
+@pytest.fixture
+def ranker_parts():
+    rng = np.random.default_rng(0)
+    n_users, n_items, n_factors = 3, 12, 4
+    user_ids = np.array(['a', 'b', 'c'])
+    scorer = SVDScorer(
+        pu=rng.normal(size=(n_users, n_factors)), bu=np.zeros(n_users),
+        qi=rng.normal(size=(n_items, n_factors)), bi=np.zeros(n_items),
+        global_mean=3.5, user_index={user_id: i for i, user_id in enumerate(user_ids)},
+        item_known=np.ones(n_items, dtype=bool),
+    )
+    # User 'a' rated items 0-2, liking 0 and 1.
+    user_items = UserItemIndex.from_triplets(user_ids, np.zeros(3, dtype=np.int64), np.arange(3), np.array([5.0, 4.0, 1.0]))
+    tfidf = csr_matrix(rng.random((n_items, 5)))
+    return scorer, user_items, tfidf
+
+
+@pytest.mark.parametrize('svd_weight, content_weight', [(0.0, 1.0), (1.0, 0.0), (0.5, 0.5)])
+def test_rank_excludes_rated_items_without_nan(ranker_parts, svd_weight, content_weight):
+    scorer, user_items, tfidf = ranker_parts
+    ranker = HybridRanker(scorer, user_items, tfidf, svd_weight=svd_weight, content_weight=content_weight, candidate_pool=12)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        top = ranker.rank(['a'], n=12)[0]
+    # Every unrated item, each once, none of the rated ones.
+    assert sorted(top.tolist()) == list(range(3, 12))
+
+
+def test_blend_keeps_masked_candidates_masked(ranker_parts):
+    scorer, user_items, tfidf = ranker_parts
+    ranker = HybridRanker(scorer, user_items, tfidf, svd_weight=0.0, content_weight=1.0)
+    with np.errstate(invalid='raise'):
+        blended = ranker.blend(np.array([[4.0, -np.inf]]), np.array([[0.5, 0.9]]))
+    assert blended[0, 0] == 0.5
+    assert blended[0, 1] == -np.inf
+
+
+@pytest.mark.parametrize('n, expected', [(2, [1, 3]), (4, [1, 3, 0]), (0, [])])
+def test_top_n_orders_ties_by_index_and_skips_masked(n, expected):
+    scores = np.array([0.5, 0.9, -np.inf, 0.9, -np.inf])
+    assert top_n(scores, n).tolist() == expected
@@ -0,0 +1,75 @@
+# tests/test_recommendations.py
+import json
+import logging
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy.exc import OperationalError
+
+from src.config import Settings
+
+
+def recommend(client):
+    response = client.get('/recommendations')
+    assert response.status_code == 200, response.text
+    return response.json()['recommendations']
+
+
+def test_bundle_user_gets_ten(api, client, login):
+    login(api.model_store.current.bundle.user_ids[0])
+    assert len(recommend(client)) == 10
+
+
+def test_new_user_gets_the_overall_ranking(api, client, login):
+    login()
+    model = api.model_store.current
+    expected = api.movies_df['title'].to_numpy()[model.cold_start.rankings.top(model.cold_start.ranking, 10)].tolist()
+    assert recommend(client) == expected
+
+
+def test_reviewer_gets_folded_in_without_their_own_movies(api, client, login):
+    login()
+    rated = [1, 2, 3, 4, 5, 7]
+    for movie_id in rated:
+        client.post('/reviews', json={'movie_id': movie_id, 'rating': 5, 'review_text': None})
+    titles = set(api.movies_df.set_index('movie_id').loc[rated, 'title'])
+    recommendations = recommend(client)
+    assert len(recommendations) == 10
+    assert not titles & set(recommendations)
+
+
+def test_review_lookup_failure_falls_back_uncached(api, client, login, monkeypatch, caplog):
+    async def fail(model, user_id):
+        raise OperationalError("SELECT", {}, Exception("database is down"))
+
+    user = login()
+    monkeypatch.setattr(api, 'fetch_user_ratings', fail)
+    with caplog.at_level(logging.ERROR, logger='src.main'):
+        assert len(recommend(client)) == 10
+    assert api.recommendation_cache.get(user.id) is None
+    assert 'database is down' in caplog.text
+    assert 'handled_errors_total{source="review_lookup"}' in client.get('/metrics').text
+
+
+@pytest.mark.parametrize('rated', [[], [1, 2], [1, 2, 3, 4, 5, 7]])
+def test_batch_matches_the_app_for_users_outside_the_model(api, client, login, monkeypatch, rated):
+    monkeypatch.setattr(api.settings, 'service_api_key', 'test-service-key')
+    user = login()
+    for movie_id in rated:
+        client.post('/reviews', json={'movie_id': movie_id, 'rating': 5, 'review_text': None})
+    known = api.model_store.current.bundle.user_ids[0]
+
+    response = client.post(
+        '/recommendations/batch', json={'user_ids': [known, user.id], 'n': 10},
+        headers={'X-Service-Key': 'test-service-key'},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line['user_id'] for line in lines] == [known, user.id]
+    assert lines[1]['recommendations'] == recommend(client)
+    login(known)
+    assert lines[0]['recommendations'] == recommend(client)
+
+
+def test_unknown_cold_start_ranking_is_rejected_at_startup():
+    with pytest.raises(ValidationError):
+        Settings(cold_start_ranking='top-rated')
@@ -0,0 +1,128 @@
+# tests/test_reviews.py
+import pytest
+
+
+def create(client, movie_id=1, rating=4, review_text="A charming, funny film."):
+    response = client.post('/reviews', json={'movie_id': movie_id, 'rating': rating, 'review_text': review_text})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_create_review_then_list_it(client, login):
+    login()
+    created = create(client, movie_id=1, rating=5)
+
+    reviews = client.get('/reviews/me').json()
+    assert [review['review_id'] for review in reviews] == [created['review_id']]
+    assert reviews[0]['title'] == 'Toy Story'
+    assert reviews[0]['rating'] == 5
+    # Scored by the background task once the response was sent.
+    assert reviews[0]['sentiment'] == 'positive'
+
+
+def test_my_reviews_only_returns_own_reviews(client, login):
+    login()
+    create(client, movie_id=2)
+    login()
+    create(client, movie_id=3)
+    reviews = client.get('/reviews/me').json()
+    assert len(reviews) == 1
+    assert reviews[0]['title'] == 'Four Rooms'
+
+
+def test_update_own_review(client, login):
+    login()
+    review_id = create(client, rating=5)['review_id']
+    assert client.get('/reviews/me').status_code == 200
+
+    response = client.put(f'/reviews/{review_id}', json={'rating': 1, 'review_text': 'Dull and far too long.'})
+    assert response.status_code == 200
+
+    reviews = client.get('/reviews/me').json()
+    assert reviews[0]['rating'] == 1
+    assert reviews[0]['review_text'] == 'Dull and far too long.'
+    assert reviews[0]['sentiment'] == 'negative'
+
+
+def test_update_someone_elses_review_is_forbidden(client, login):
+    login()
+    review_id = create(client, rating=5)['review_id']
+    login()
+    response = client.put(f'/reviews/{review_id}', json={'rating': 1, 'review_text': 'hijacked'})
+    assert response.status_code == 403
+
+
+def test_update_missing_review(client, login):
+    login()
+    response = client.put('/reviews/999999', json={'rating': 3, 'review_text': None})
+    assert response.status_code == 404
+
+
+def test_my_reviews_revalidates_with_etag(client, login):
+    login()
+    create(client)
+    first = client.get('/reviews/me')
+    etag = first.headers['etag']
+    assert client.get('/reviews/me', headers={'If-None-Match': etag}).status_code == 304
+
+    create(client, movie_id=2)
+    refreshed = client.get('/reviews/me', headers={'If-None-Match': etag})
+    assert refreshed.status_code == 200
+    assert len(refreshed.json()) == 2
+
+
+def test_write_on_another_worker_is_seen_at_once(api, client, login):
+    from sqlalchemy import text
+
+    login()
+    review_id = create(client, rating=5)['review_id']
+    etag = client.get('/reviews/me').headers['etag']
+    # Straight to the database, as a write handled by another worker would be: nothing local is evicted.
+    with api.engine.begin() as connection:
+        connection.execute(text("UPDATE reviews SET rating = 2 WHERE review_id = :id"), {"id": review_id})
+
+    response = client.get('/reviews/me', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json()[0]['rating'] == 2
+
+
+def test_search_by_title(client):
+    results = client.get('/movies/', params={'title': 'star wars'}).json()
+    assert {'movie_id': 50, 'title': 'Star Wars', 'genres': 'Action Adventure Romance Sci-Fi War'} in results
+
+
+@pytest.mark.parametrize('genre', ['Film-Noir', 'film-noir'])
+def test_search_by_genre(client, genre):
+    results = client.get('/movies/', params={'genre': genre, 'limit': 100}).json()
+    assert results
+    assert all('Film-Noir' in movie['genres'] for movie in results)
+
+
+def test_search_unknown_genre(client):
+    assert client.get('/movies/', params={'genre': 'Cowboy'}).status_code == 400
+
+
+def test_search_pages_cover_every_match_once(client):
+    seen, cursor = [], None
+    while True:
+        params = {'title': 'the', 'limit': 25}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/movies/', params=params)
+        assert response.status_code == 200
+        seen += [movie['movie_id'] for movie in response.json()]
+        cursor = response.headers.get('x-next-cursor')
+        if not cursor:
+            break
+    everything = client.get('/movies/', params={'title': 'the', 'limit': 100}).json()
+    assert len(seen) == len(set(seen)) > 100
+    assert seen[:100] == [movie['movie_id'] for movie in everything]
+
+
+@pytest.mark.parametrize('n', [0, 101])
+def test_similar_rejects_bad_n(client, n):
+    assert client.get('/movies/1/similar', params={'n': n, 'mode': 'collaborative'}).status_code == 422
+
+
+def test_search_rejects_bad_cursor(client):
+    assert client.get('/movies/', params={'cursor': 'not-a-cursor'}).status_code == 400
@@ -0,0 +1,40 @@
+# tests/test_serving.py
+import shutil
+
+import pytest
+
+from src.artifacts import ARRAY_NAMES, current_bundle_path, load_bundle, new_version, write_bundle
+from src.serving import CatalogueMismatch, ModelStore
+
+
+@pytest.fixture
+def root(bundle_root, tmp_path):
+    return str(shutil.copytree(bundle_root, tmp_path / 'artifacts'))
+
+
+def republish(root, **replaced):
+    """Publishes a copy of the CURRENT bundle under a new version, with some arrays replaced."""
+    bundle = load_bundle(current_bundle_path(root))
+    arrays = {name: getattr(bundle, name) for name in ARRAY_NAMES}
+    return write_bundle(dict(arrays, **replaced), dict(bundle.metadata, version=new_version()), root)
+
+
+def test_bundle_over_another_catalogue_is_not_swapped_in(root, movies):
+    store = ModelStore(root, movie_ids=movies['movie_id'].to_numpy())
+    served = store.current
+    renumbered = movies['movie_id'].to_numpy() + 1
+    republish(root, movie_ids=renumbered)
+
+    assert store.reload_if_changed() is False
+    assert store.current is served
+    # Refused once, not reloaded on every poll.
+    assert store.reload_if_changed() is False
+
+    path = republish(root, movie_ids=movies['movie_id'].to_numpy())
+    assert store.reload_if_changed() is True
+    assert store.current.bundle.path == path
+
+
+def test_startup_refuses_a_mismatched_bundle(root, movies):
+    with pytest.raises(CatalogueMismatch):
+        ModelStore(root, movie_ids=movies['movie_id'].to_numpy()[:-1])
@@ -0,0 +1,83 @@
+# tests/test_updater.py
+import shutil
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+from src.artifacts import current_bundle_path, load_bundle
+from src.updater import run_update
+from src.user_index import UserItemIndex
+
+
+@pytest.fixture
+def root(bundle_root, tmp_path):
+    """A private copy of the test bundle, since run_update publishes into its root."""
+    return shutil.copytree(bundle_root, tmp_path / 'artifacts')
+
+
+def write(engine, sql, **params):
+    with engine.begin() as connection:
+        connection.execute(text(sql), params)
+
+
+def insert(engine, user_id, movie_id, rating, updated_at):
+    write(
+        engine,
+        "INSERT INTO reviews (user_id, movie_id, rating, created_at, updated_at) "
+        "VALUES (:user_id, :movie_id, :rating, :updated_at, :updated_at)",
+        user_id=user_id, movie_id=movie_id, rating=rating, updated_at=updated_at,
+    )
+
+
+def rated(root, user_id):
+    items, values = UserItemIndex.from_bundle(load_bundle(current_bundle_path(root))).rated(user_id)
+    return dict(zip(items.tolist(), values.tolist()))
+
+
+def test_new_reviews_are_folded_in_once(database, root):
+    insert(database, 'u1', 1, 5, '2026-01-01 10:00:00')
+    stats = run_update(database, root=str(root))
+    assert stats['new_users'] == 1
+    assert rated(root, 'u1') == {0: 5.0}
+    assert run_update(database, root=str(root)) is None
+
+
+def test_same_timestamp_rows_committed_later_are_not_skipped(database, root):
+    insert(database, 'u1', 1, 5, '2026-01-01 10:00:00')
+    run_update(database, root=str(root))
+    # Committed after the pass, but stamped with the watermark's own second.
+    insert(database, 'u2', 2, 4, '2026-01-01 10:00:00')
+    stats = run_update(database, root=str(root))
+    assert stats['new_reviews'] == 1
+    assert rated(root, 'u2') == {1: 4.0}
+    assert run_update(database, root=str(root)) is None
+
+
+def test_edited_ratings_reach_the_model(database, root):
+    insert(database, 'u1', 1, 5, '2026-01-01 10:00:00')
+    insert(database, 'u1', 2, 5, '2026-01-01 10:00:00')
+    run_update(database, root=str(root))
+    write(database, "UPDATE reviews SET rating = 1, updated_at = '2026-01-01 10:05:00' WHERE movie_id = 1")
+    stats = run_update(database, root=str(root))
+    assert stats is not None
+    assert rated(root, 'u1') == {0: 1.0, 1: 5.0}
+
+
+def test_edit_within_the_watermark_second_is_picked_up(database, root):
+    insert(database, 'u1', 1, 5, '2026-01-01 10:00:00')
+    run_update(database, root=str(root))
+    write(database, "UPDATE reviews SET rating = 2 WHERE movie_id = 1")
+    assert run_update(database, root=str(root)) is not None
+    assert rated(root, 'u1') == {0: 2.0}
+
+
+def test_update_endpoint_bumps_updated_at(api, client, login):
+    login()
+    review_id = client.post('/reviews', json={'movie_id': 1, 'rating': 3}).json()['review_id']
+    with api.engine.begin() as connection:
+        connection.execute(text("UPDATE reviews SET updated_at = '2000-01-01 00:00:00' WHERE review_id = :id"), {"id": review_id})
+    client.put(f'/reviews/{review_id}', json={'rating': 4})
+    with api.engine.connect() as connection:
+        updated_at = connection.execute(text("SELECT updated_at FROM reviews WHERE review_id = :id"), {"id": review_id}).scalar_one()
+    assert np.datetime64(updated_at) > np.datetime64('2000-01-01')